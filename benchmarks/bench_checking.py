@@ -0,0 +1,157 @@
+"""
+Throughput of post checking against the local GigaChat stand-in.
+
+Every round inserts fresh synthetic posts into a temporary SQLite database
+and checks them with check_unchecked_posts. Posts contain a trigger word
+and random words, so they pass the prefilter and miss the verdict cache
+and near-duplicate search: every post costs a GigaChat request.
+
+    python -m benchmarks.bench_checking --posts 200 --concurrency 1 5 10 20 \\
+        --latency 0.3 --rate-limit 30 --error-rate 0.02
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+# База и переменные окружения нужны до импорта модулей бота
+_db_dir = tempfile.mkdtemp(prefix="bench_checking_")
+os.environ["DB_URL"] = f"sqlite+aiosqlite:///{_db_dir}/bench.db"
+os.environ.setdefault("TELEGRAM_API_ID", "0")
+
+import core.ai_filter as ai_filter  # noqa: E402
+import core.checking as checking  # noqa: E402
+from config import TRIGGER_WORDS  # noqa: E402
+from database.database import engine  # noqa: E402
+from database.db_commands import save_posts_many  # noqa: E402
+from database.models import Base  # noqa: E402
+from utils.fake_gigachat import FakeGigaChat, SCAM_MARKERS  # noqa: E402
+
+
+WORDS = (
+    "канал", "новости", "сегодня", "вечером", "город", "проект", "команда",
+    "работа", "деньги", "рынок", "курс", "предложение", "условия", "клиент",
+)
+
+
+def synthetic_posts(count: int, round_no: int, rng: random.Random) -> list:
+    posts = []
+    for i in range(count):
+        words = rng.choices(WORDS, k=12) + [f"слово{rng.getrandbits(48):x}" for _ in range(4)]
+        words.insert(rng.randrange(len(words)), rng.choice(TRIGGER_WORDS))
+        if rng.random() < 0.3:
+            words.append(rng.choice(SCAM_MARKERS) + "ок")
+        posts.append({
+            "channel_link": "https://t.me/bench",
+            "post_link": f"https://t.me/bench/{round_no}_{i}",
+            "post_text": " ".join(words),
+        })
+    return posts
+
+
+def percentile(values: list, share: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(share * len(values)))]
+
+
+async def run_round(fake, round_no, posts, concurrency, rng) -> dict:
+    await save_posts_many(synthetic_posts(posts, round_no, rng))
+    server_before = fake.stats.copy()
+    latencies = []
+    check_and_mark = checking.check_and_mark
+
+    async def timed_check_and_mark(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await check_and_mark(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - started)
+
+    checking.check_and_mark = timed_check_and_mark
+    started = time.perf_counter()
+    try:
+        stats = await checking.check_unchecked_posts(concurrency=concurrency)
+    finally:
+        checking.check_and_mark = check_and_mark
+    elapsed = time.perf_counter() - started
+
+    server = fake.stats - server_before
+    return {
+        "concurrency": concurrency,
+        "posts/s": stats["checked"] / elapsed if elapsed else 0.0,
+        "p50, s": percentile(latencies, 0.50),
+        "p99, s": percentile(latencies, 0.99),
+        "checked": stats["checked"],
+        "errors": stats["errors"],
+        "requests": server["200"] + server["429"] + server["500"],
+        "429": server["429"],
+        "500": server["500"],
+    }
+
+
+def print_table(rows: list):
+    columns = list(rows[0])
+    print(" | ".join(f"{column:>11}" for column in columns))
+    for row in rows:
+        print(" | ".join(
+            f"{value:>11.3f}" if isinstance(value, float) else f"{value:>11}"
+            for value in row.values()
+        ))
+
+
+async def main(args):
+    engine.echo = False
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    fake = FakeGigaChat(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        seed=args.seed,
+    )
+    base_url = await fake.start()
+    ai_filter.GIGACHAT_OAUTH_URL = f"{base_url}/api/v2/oauth"
+    ai_filter.GIGACHAT_API_URL = f"{base_url}/api/v1"
+    ai_filter.post_batcher.max_posts = args.batch_size
+
+    rng = random.Random(args.seed)
+    rows = []
+    try:
+        for round_no, concurrency in enumerate(args.concurrency):
+            # Каждый прогон начинается с закрытым circuit breaker
+            ai_filter.circuit_breaker = ai_filter.CircuitBreaker()
+            rows.append(await run_round(fake, round_no, args.posts, concurrency, rng))
+    finally:
+        await ai_filter.gigachat_client.close()
+        await fake.stop()
+        await engine.dispose()
+
+    print(
+        f"Постов в прогоне: {args.posts}, пакет: {args.batch_size}, "
+        f"задержка API: {args.latency}±{args.jitter} с, "
+        f"ошибки: {args.error_rate:.0%}, лимит: {args.rate_limit or '-'} запр/с"
+    )
+    print_table(rows)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--posts", type=int, default=200, help="Posts per round")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 5, 10, 20])
+    parser.add_argument("--batch-size", type=int, default=1, help="1 - one post per request")
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
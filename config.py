@@ -1,4 +1,5 @@
 import os
+import socket
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -8,6 +9,8 @@ TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_API_ID = int(os.getenv("TELEGRAM_API_ID"))
 TELEGRAM_API_HASH = os.getenv("TELEGRAM_API_HASH")
 TELEGRAM_PHONE = os.getenv("TELEGRAM_PHONE")
+# Файлы сессий аккаунтов для парсинга, через запятую
+TELEGRAM_SESSIONS = os.getenv("TELEGRAM_SESSIONS", "data/user_session").split(",")
 
 AUTHORIZATION_KEY = os.getenv("AUTHORIZATION_KEY")
 GIGACHAT_API_KEY = os.getenv("GIGACHAT_API_KEY")
@@ -17,6 +20,59 @@ CHECK_INTERVAL = os.getenv("50")
 FIND_INTERVAL = os.getenv("50")
 MAX_POSTS_PER_CHANNEL = 1000
 
+# Сколько каналов парсится одновременно на одном аккаунте
+PARSE_CONCURRENCY = int(os.getenv("PARSE_CONCURRENCY", 5))
+# Лимиты запросов к Telegram API по классам методов:
+# (стартовая скорость в запросах/сек, размер пачки). Скорость подстраивается по FloodWait
+TELEGRAM_RATE_LIMITS = {
+    "resolve": (0.2, 3),
+    "history": (1.0, 5),
+    "default": (1.0, 5),
+}
+# FloodWait дольше этого (сек) не ждём, а переносим канал на другой аккаунт
+TELEGRAM_MAX_FLOOD_WAIT = 60
+# Через сколько дней сохранённые id и access_hash канала резолвятся заново
+CHAT_CACHE_TTL_DAYS = int(os.getenv("CHAT_CACHE_TTL_DAYS", 30))
+# Сколько постов копится в буфере перед записью в БД
+PARSE_FLUSH_SIZE = 100
+# Через сколько сообщений полный парсинг сохраняет чекпоинт (одна страница истории)
+BACKFILL_CHECKPOINT_EVERY = 100
+
+# Потоковый режим парсинг -> запись -> проверка:
+# ёмкость очередей между стадиями (в пачках) и число одновременных проверок
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 10))
+PIPELINE_CHECK_CONCURRENCY = int(os.getenv("PIPELINE_CHECK_CONCURRENCY", 3))
+
+# Проверка накопившихся постов: сколько постов проверяется одновременно
+# (не меньше GIGACHAT_BATCH_SIZE, иначе пакеты не набираются)
+CHECK_CONCURRENCY = int(os.getenv("CHECK_CONCURRENCY", 10))
+# Несколько проверяющих процессов делят посты через аренду: воркер забирает
+# страницу постов на CHECK_LEASE_SECONDS, потом их может забрать другой
+CHECK_LEASE_SECONDS = int(os.getenv("CHECK_LEASE_SECONDS", 600))
+CHECK_WORKER_NAME = os.getenv("CHECK_WORKER_NAME") or socket.gethostname()
+
+# Прогресс долгих задач бот показывает в одном сообщении и правит его
+# не чаще раза в PROGRESS_EDIT_INTERVAL секунд
+PROGRESS_EDIT_INTERVAL = float(os.getenv("PROGRESS_EDIT_INTERVAL", 5))
+
+# Статистика читается из счётчиков; раз в STATS_RECONCILE_INTERVAL секунд
+# они пересчитываются по таблице постов
+STATS_RECONCILE_INTERVAL = int(os.getenv("STATS_RECONCILE_INTERVAL", 3600))
+
+# Кэш вердиктов по нормализованному тексту: срок жизни и размер LRU в памяти
+VERDICT_CACHE_TTL_DAYS = int(os.getenv("VERDICT_CACHE_TTL_DAYS", 90))
+VERDICT_CACHE_SIZE = 10000
+
+# Локальный классификатор: файл модели, границы вероятности, ниже и выше которых
+# вердикт выносится без GigaChat, и минимум размеченных постов для обучения
+LOCAL_MODEL_PATH = os.getenv("LOCAL_MODEL_PATH", "data/local_model.npz")
+LOCAL_MODEL_CLEAN_BELOW = float(os.getenv("LOCAL_MODEL_CLEAN_BELOW", 0.05))
+LOCAL_MODEL_SCAM_ABOVE = float(os.getenv("LOCAL_MODEL_SCAM_ABOVE", 0.95))
+LOCAL_MODEL_MIN_SAMPLES = 200
+
+# Минимальная похожесть (Жаккар по словам), при которой пост наследует вердикт двойника
+NEAR_DUPLICATE_MIN_SIMILARITY = 0.8
+
 # Список каналов для парсинга
 CHANNELS_TO_PARSE = [
     "https://t.me/smartmarket_community",
@@ -28,3 +84,17 @@ TRIGGER_WORDS = [
     "пассивный доход", "биткоин", "криптовалюта", "форекс", "ставки",
     "пирамида", "обман", "мошенничество", "легкие деньги"
 ]
+
+# Префильтр перед LLM. Пост с триггерным словом или одним из признаков ниже
+# уходит в GigaChat, пустой и короткий пост без них сразу считается чистым
+PREFILTER_MIN_WORDS = int(os.getenv("PREFILTER_MIN_WORDS", 5))
+# (имя правила, регулярное выражение), регистр не важен
+PREFILTER_SIGNAL_PATTERNS = [
+    ("link", r"https?://|t\.me/|www\."),
+    ("mention", r"(?<!\w)@\w{4,}"),
+    ("money", r"\d[\d\s]*(?:₽|\$|€|руб|usdt|тыс|к\b)"),
+    ("call_to_action", r"пиши(?:те)? в (?:лс|личк)|переходи(?:те)?|жми(?:те)?|регистрир"),
+    ("bait", r"бесплатн|срочно|только сегодня|ограниченн|кэшбэк|кешбэк|бонус|подар|заработ|доход"),
+]
+# Считать чистыми и длинные посты без триггеров и признаков
+PREFILTER_CLEAR_WITHOUT_SIGNALS = os.getenv("PREFILTER_CLEAR_WITHOUT_SIGNALS", "1") == "1"
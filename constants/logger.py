@@ -6,6 +6,7 @@ LOG_DB = {
     "process": "📡 Обрабатываем канал: {channel}",
     "parse_error": "❌ Ошибка при парсинге активных каналов: {e}",
     "save_post": "✅ Пост сохранён: {link} ({date})",
+    "save_posts": "✅ Сохранено постов: {saved} из {total} ({channel})",
     "patter_error": "❌ Ошибка при добавлении шаблона '{pattern}': {e}",
     "in_blacklist": "ℹ Шаблон '{pattern}' уже в черном списке",
     "pattern_save": "✅ Шаблон '{pattern}' добавлен в черный список: {reason}",
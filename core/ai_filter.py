@@ -1,6 +1,10 @@
 import aiohttp
 import asyncio
+import hashlib
 import json
+import logging
+import random
+import re
 import uuid
 import time
 import ssl
@@ -13,10 +17,87 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 GIGACHAT_API_KEY = os.getenv("GIGACHAT_API_KEY")
+# Адреса API. Для тестов и бенчмарков можно указать utils/fake_gigachat.py
+GIGACHAT_OAUTH_URL = os.getenv(
+    "GIGACHAT_OAUTH_URL", "https://ngw.devices.sberbank.ru:9443/api/v2/oauth"
+)
+GIGACHAT_API_URL = os.getenv("GIGACHAT_API_URL", "https://gigachat.devices.sberbank.ru/api/v1")
+# Сколько соединений держит пул и сколько секунд живёт простаивающее соединение
+GIGACHAT_CONNECTION_LIMIT = int(os.getenv("GIGACHAT_CONNECTION_LIMIT", 10))
+GIGACHAT_KEEPALIVE_TIMEOUT = float(os.getenv("GIGACHAT_KEEPALIVE_TIMEOUT", 60))
+
+# Пакетная проверка: сколько постов в одном запросе, бюджет токенов на посты
+# и сколько секунд ждать, пока наберётся пакет. GIGACHAT_BATCH_SIZE=1 отключает пакеты
+GIGACHAT_BATCH_SIZE = int(os.getenv("GIGACHAT_BATCH_SIZE", 10))
+GIGACHAT_BATCH_TOKEN_BUDGET = int(os.getenv("GIGACHAT_BATCH_TOKEN_BUDGET", 6000))
+GIGACHAT_BATCH_WAIT = float(os.getenv("GIGACHAT_BATCH_WAIT", 0.2))
+
+# Повторы запросов при 429, 5xx и ошибках соединения (401 - после обновления токена)
+GIGACHAT_MAX_RETRIES = int(os.getenv("GIGACHAT_MAX_RETRIES", 4))
+GIGACHAT_RETRY_BASE_DELAY = 1.0
+GIGACHAT_RETRY_MAX_DELAY = 30.0
+RETRYABLE_STATUSES = {401, 429, 500, 502, 503, 504}
+# Сколько неудач подряд приостанавливают проверку и на сколько секунд
+GIGACHAT_BREAKER_THRESHOLD = int(os.getenv("GIGACHAT_BREAKER_THRESHOLD", 5))
+GIGACHAT_BREAKER_COOLDOWN = float(os.getenv("GIGACHAT_BREAKER_COOLDOWN", 30))
+
+# За сколько секунд до истечения токен обновляется в фоне
+TOKEN_REFRESH_MARGIN = 120
+# Срок жизни токена, если сервер не прислал expires_at
+TOKEN_DEFAULT_TTL = 1800
+
+# Промпт классификатора. При любом изменении меняется PROMPT_VERSION,
+# и закэшированные вердикты старого промпта больше не используются
+SYSTEM_PROMPT = (
+    "Ты эксперт по выявлению мошеннического и манипулятивного контента в постах. "
+    "Признаки: обещание выгод или подарков за действия (переводы, заполнение форм); "
+    "подозрительные ссылки или просьбы прислать личные данные; слова \"бесплатно\", "
+    "\"срочно\", \"ограниченное время\", \"только сегодня\", \"кэшбэк\"; манипулятивный "
+    "стиль и ложное доверие к источнику; призыв к действию без проверенного источника. "
+    "Истории очевидцев об обмане тоже считаются."
+)
+USER_PROMPT = (
+    "Есть ли в тексте схема для заработка или получения бонусов, попытка обмана человека "
+    'или история об обмане? Ответь одним словом: да или нет.\nТекст: "{post_text}"'
+)
+BATCH_USER_PROMPT = (
+    "Для каждого поста ниже определи, есть ли в нём потенциальные схемы для заработка "
+    "или получения бонусов, попытка обмана человека или история об обмане. "
+    'Ответь только JSON-массивом без пояснений: [{{"id": 1, "answer": "да"}}, '
+    '{{"id": 2, "answer": "нет"}}], по одному элементу на каждый пост.\n\n{posts}'
+)
+BATCH_POST_TEMPLATE = "### Пост {id}\n{text}\n"
+# Второй проход только для мошеннических постов: почему модель так решила
+EXPLAIN_SYSTEM_PROMPT = """
+                        Ты являешься экспертом по анализу текста и выявлению потенциально опасного контента. Проанализируй следующий текст поста и определи, содержит ли он признаки, которые могут быть связаны с мошенническими или манипулятивными схемами.
+                        В переданном тексте могут быть попытки обмана или манипуляции над человеком или истории очевидцев
+
+                        Вот критерии анализа:
+                        1. Обещание выгод/подарков за выполнение действий (например, переводы, заполнение форм).
+                        2. Подозрительные ссылки или призывы предоставлять личные данные.
+                        3. Использование слов: "бесплатно", "срочно", "ограниченное время", "только сегодня", "кэшбэк".
+                        4. Стиль текста: манипулятивный, создающий ложное доверие к источнику.
+                        5. Призыв к действию без ясного и проверенного источника.
 
-# Кэш токена
-token_cache = {"access_token": None, "expires_at": 0}
+                        Если такие признаки найдены, перечисли их и укажи уровень риска (низкий, средний, высокий)
+                    """
+EXPLAIN_USER_PROMPT = 'Проанализируй текст поста: "{post_text}"'
+
+PROMPT_VERSION = hashlib.sha256(
+    f"{SYSTEM_PROMPT}\n{USER_PROMPT}\n{BATCH_USER_PROMPT}".encode("utf-8")
+).hexdigest()[:16]
+# Текст поста обрезается до этой длины
+MAX_POST_CHARS = 4000
+# Ответ классификатора - одно слово, на пост в пакете хватает ~15 токенов JSON
+VERDICT_MAX_TOKENS = 5
+BATCH_ITEM_MAX_TOKENS = 15
+EXPLANATION_MAX_TOKENS = 300
+GIGACHAT_EXPLAIN_POSITIVES = os.getenv("GIGACHAT_EXPLAIN_POSITIVES", "0") == "1"
+
+VERDICT_RE = re.compile(r"^\W*(да|нет|yes|no)\b", re.IGNORECASE)
 
 # Путь к SSL-сертификату
 cert_path = 'russian_trusted_root_ca.cer'
@@ -27,126 +108,550 @@ def create_ssl_contex():
     return ssl_context
 
 
+class GigaChatClient:
+    """
+    Owner of one pooled aiohttp session for all GigaChat requests
+
+    Connections are kept alive between requests, so a post does not pay for
+    a new TCP and TLS handshake. The session is opened in the bot startup
+    and closed on shutdown; if it is used before that (tests, scripts) it is
+    opened on first use.
+    """
+
+    def __init__(
+        self,
+        limit: int = GIGACHAT_CONNECTION_LIMIT,
+        keepalive_timeout: float = GIGACHAT_KEEPALIVE_TIMEOUT,
+    ):
+        self.limit = limit
+        self.keepalive_timeout = keepalive_timeout
+        self._session = None
+        self._loop = None
+
+    async def open(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit,
+            keepalive_timeout=self.keepalive_timeout,
+            ssl=False,
+        )
+        self._session = aiohttp.ClientSession(connector=connector)
+        self._loop = asyncio.get_running_loop()
+        return self._session
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        # Сессия привязана к циклу событий, в котором создана
+        if (
+            self._session is None
+            or self._session.closed
+            or self._loop is not asyncio.get_running_loop()
+        ):
+            return await self.open()
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+gigachat_client = GigaChatClient()
+
+
 def generate_rquid():
     """Генерирует корректный RqUID в формате UUID4"""
     return str(uuid.uuid4())
 
 
-async def get_gigachat_token():
-    """Исправленная версия с правильной настройкой SSL"""
-    print("get token")
-    if token_cache["access_token"] and time.time() < token_cache["expires_at"]:
-        return token_cache["access_token"]
-
-    # Создаем SSL контекст с нашим сертификатом
-    ssl_context = create_ssl_contex()
-
-    url = "https://ngw.devices.sberbank.ru:9443/api/v2/oauth"
-    headers = {
-        "Content-Type": "application/x-www-form-urlencoded",
-        "Accept": "application/json",
-        "RqUID": str(uuid.uuid4()),
-        "Authorization": f"Basic {GIGACHAT_API_KEY}",
-    }
-
-    try:
-        async with aiohttp.ClientSession() as session:
+class TokenManager:
+    """
+    OAuth token of GigaChat shared by all requests
+
+    Concurrent callers of an expired token wait for one refresh request
+    instead of each asking for its own token. A token that is about to
+    expire is still returned while a new one is fetched in the background,
+    so requests do not wait on the OAuth round trip.
+    """
+
+    def __init__(self, refresh_margin: float = TOKEN_REFRESH_MARGIN):
+        self.refresh_margin = refresh_margin
+        self.access_token = None
+        self.expires_at = 0.0
+        self._lock = None
+        self._loop = None
+        self._refresh_task = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        # Lock привязывается к циклу событий, как и сессия aiohttp
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+            self._refresh_task = None
+        return self._lock
+
+    def _is_valid(self) -> bool:
+        return self.access_token is not None and time.time() < self.expires_at
+
+    async def _request_token(self):
+        """
+        Returns:
+            tuple: (access_token, expires_at in unix seconds) or None on error
+        """
+        url = GIGACHAT_OAUTH_URL
+        headers = {
+            "Content-Type": "application/x-www-form-urlencoded",
+            "Accept": "application/json",
+            "RqUID": str(uuid.uuid4()),
+            "Authorization": f"Basic {GIGACHAT_API_KEY}",
+        }
+
+        try:
+            session = await gigachat_client.get_session()
             async with session.post(
                 url,
                 headers=headers,
                 data={"scope": "GIGACHAT_API_PERS"},
-                ssl=False,  # Передаем SSL контекст
             ) as response:
                 if response.status == 200:
                     token_data = await response.json()
-                    token_cache.update(
-                        {
-                            "access_token": token_data["access_token"],
-                            "expires_at": time.time() + 1800,
-                        }
-                    )
+                    expires_at = token_data.get("expires_at")
+                    if expires_at is None:
+                        expires_at = time.time() + TOKEN_DEFAULT_TTL
+                    elif expires_at > 10**11:
+                        # Сервер отдаёт время истечения в миллисекундах
+                        expires_at = expires_at / 1000
                     print("access token")
-                    return token_cache["access_token"]
+                    return token_data["access_token"], float(expires_at)
                 print(f"Ошибка HTTP: {response.status}")
-    except Exception as e:
-        print("1st error")
-        print(f"Ошибка соединения: {e}")
-    return None
+        except Exception as e:
+            print("1st error")
+            print(f"Ошибка соединения: {e}")
+        return None
 
+    async def _refresh(self):
+        async with self._get_lock():
+            # Пока ждали блокировку, токен мог обновить кто-то другой
+            if self._is_valid() and not self._expires_soon():
+                return
+            result = await self._request_token()
+            if result:
+                self.access_token, self.expires_at = result
 
-async def analyze_post_with_gigachat(post_text: str) -> str:
-    """Асинхронный анализ текста с исправленным SSL"""
-    print("in analyze")
+    def _expires_soon(self) -> bool:
+        return time.time() >= self.expires_at - self.refresh_margin
+
+    async def get_token(self):
+        self._get_lock()
+        if self._is_valid():
+            if self._expires_soon() and (
+                self._refresh_task is None or self._refresh_task.done()
+            ):
+                self._refresh_task = asyncio.create_task(self._refresh())
+            return self.access_token
+
+        await self._refresh()
+        return self.access_token if self._is_valid() else None
+
+    def invalidate(self):
+        """Forget the token, e.g. after the API answered 401"""
+        self.access_token = None
+        self.expires_at = 0.0
+
+
+token_manager = TokenManager()
+
+
+async def get_gigachat_token():
+    """Действующий токен GigaChat или None, если получить его не удалось"""
+    print("get token")
+    return await token_manager.get_token()
+
+
+class CircuitBreaker:
+    """
+    Pauses GigaChat requests while the API is unhealthy or rate limited
+
+    After failure_threshold failures in a row (5xx, connection errors or a
+    request that ran out of retries) the breaker opens for cooldown
+    seconds. After the pause a single probe request goes through and the
+    others wait for it: success closes the breaker, failure opens it again.
+    A 429 is not a failure: its delay is shared through not_before, so all
+    requests resume together instead of each hitting the limit again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = GIGACHAT_BREAKER_THRESHOLD,
+        cooldown: float = GIGACHAT_BREAKER_COOLDOWN,
+        clock=time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.failures = 0
+        self.opened_until = 0.0
+        self.not_before = 0.0
+        self.probing = False
+        self._probe_done = asyncio.Event()
+
+    def is_open(self) -> bool:
+        return self.clock() < self.opened_until
+
+    async def wait(self):
+        while True:
+            now = self.clock()
+            resume_at = max(self.opened_until, self.not_before)
+            if now < resume_at:
+                await asyncio.sleep(resume_at - now)
+            elif self.failures < self.failure_threshold:
+                return
+            elif not self.probing:
+                # Пауза кончилась: пропускаем один пробный запрос, остальные ждут его
+                self.probing = True
+                self._probe_done.clear()
+                return
+            else:
+                await self._probe_done.wait()
+
+    def release(self):
+        """The request finished without telling whether the API is healthy"""
+        if self.probing:
+            self.probing = False
+            self._probe_done.set()
+
+    def delay(self, seconds: float):
+        """Hold all requests for seconds, e.g. after a 429 with Retry-After"""
+        self.not_before = max(self.not_before, self.clock() + seconds)
+        self.release()
+
+    def record_success(self):
+        self.failures = 0
+        self.release()
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            if not self.is_open():
+                logger.warning(f"GigaChat недоступен, запросы приостановлены на {self.cooldown} с")
+            self.opened_until = self.clock() + self.cooldown
+        self.release()
+
+
+circuit_breaker = CircuitBreaker()
+
+
+def _is_outage(response: str) -> bool:
+    """5xx и ошибки соединения - признак недоступности API, в отличие от 401 и 429"""
+    return response == "Ошибка соединения" or response.startswith("Ошибка API: 5")
+
+
+def _retry_delay(attempt: int, retry_after: str = None) -> float:
+    """Retry-After от сервера, иначе экспоненциальная задержка со случайным разбросом"""
+    if retry_after:
+        try:
+            return min(float(retry_after), GIGACHAT_RETRY_MAX_DELAY)
+        except ValueError:
+            pass
+    return random.uniform(0, min(GIGACHAT_RETRY_MAX_DELAY, GIGACHAT_RETRY_BASE_DELAY * 2 ** attempt))
+
+
+async def _send_completion(payload: dict):
+    """
+    Один запрос без повторов
+
+    Returns:
+        tuple: (текст ответа или ошибки, можно ли повторить, Retry-After)
+    """
     token = await get_gigachat_token()
-    print("cont analyze")
     if not token:
         print("no token")
-        return "Ошибка: не удалось получить токен"
+        # TokenManager уже сделал свой запрос; повторять нечего, но API считается нездоровым
+        circuit_breaker.record_failure()
+        return "Ошибка: не удалось получить токен", False, None
+
+    url = f"{GIGACHAT_API_URL}/chat/completions"
+    try:
+        session = await gigachat_client.get_session()
+        async with session.post(
+            url,
+            json=payload,
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json",
+            },
+            timeout=aiohttp.ClientTimeout(total=30),
+        ) as response:
+            if response.status == 200:
+                data = await response.json()
+                return data["choices"][0]["message"]["content"].strip(), False, None
+            if response.status == 401:
+                token_manager.invalidate()
+            retryable = response.status in RETRYABLE_STATUSES
+            return f"Ошибка API: {response.status}", retryable, response.headers.get("Retry-After")
+
+    except Exception as e:
+        print(f"Ошибка запроса: {e}")
+        return "Ошибка соединения", True, None
+
 
-    # Создаем SSL контекст для основного запроса
-    ssl_context = create_ssl_contex()
+async def _chat_completion(messages: list, max_tokens: int = None) -> str:
+    """
+    Запрос к GigaChat: текст ответа или текст ошибки
 
-    url = "https://gigachat.devices.sberbank.ru/api/v1/chat/completions"
+    429, 5xx и ошибки соединения повторяются с задержкой, пока открыт
+    circuit breaker, запрос ждёт. Задержка после 429 общая для всех
+    запросов, в breaker засчитываются только 5xx, ошибки соединения и
+    исчерпанные повторы.
+    """
     payload = {
         "model": "GigaChat",
-        "messages": [
-            {
-                "role": "system",
-                "content": """
-                        Ты являешься экспертом по анализу текста и выявлению потенциально опасного контента. Проанализируй следующий текст поста и определи, содержит ли он признаки, которые могут быть связаны с мошенническими или манипулятивными схемами.
-                        В переданном тексте могут быть попытки обмана или манипуляции над человеком или истории очевидцев
+        "messages": messages,
+        "temperature": 0.1,
+    }
+    if max_tokens:
+        payload["max_tokens"] = max_tokens
+
+    for attempt in range(GIGACHAT_MAX_RETRIES + 1):
+        await circuit_breaker.wait()
+        try:
+            response, retryable, retry_after = await _send_completion(payload)
+        except asyncio.CancelledError:
+            circuit_breaker.release()
+            raise
+        if not is_api_error(response):
+            circuit_breaker.record_success()
+            return response
+        if not retryable:
+            circuit_breaker.release()
+            return response
+        if attempt == GIGACHAT_MAX_RETRIES:
+            break
+        delay = _retry_delay(attempt, retry_after)
+        if response == "Ошибка API: 429":
+            # Лимит общий: ждут все запросы, а не только получивший 429
+            circuit_breaker.delay(delay)
+            continue
+        if _is_outage(response):
+            circuit_breaker.record_failure()
+        else:
+            circuit_breaker.release()
+        await asyncio.sleep(delay)
+    circuit_breaker.record_failure()
+    return response
 
-                        Вот критерии анализа:
-                        1. Обещание выгод/подарков за выполнение действий (например, переводы, заполнение форм).
-                        2. Подозрительные ссылки или призывы предоставлять личные данные.
-                        3. Использование слов: "бесплатно", "срочно", "ограниченное время", "только сегодня", "кэшбэк".
-                        4. Стиль текста: манипулятивный, создающий ложное доверие к источнику.
-                        5. Призыв к действию без ясного и проверенного источника.
 
-                        Если такие признаки найдены, перечисли их и укажи уровень риска (низкий, средний, высокий)
-                    """,
-            },
-            {
-                "role": "user",
-                "content": f'Определи есть в тексте потенциальные схемы для заработка или получения бонусов или попытка обмана человека или история об обмане, ответь да или нет, пример текста:  "{post_text[:4000]}"',
-            },
+async def analyze_post_with_gigachat(post_text: str) -> str:
+    """Асинхронный анализ текста с исправленным SSL"""
+    print("in analyze")
+    return await _chat_completion(
+        [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": USER_PROMPT.format(post_text=post_text[:MAX_POST_CHARS])},
         ],
-        "temperature": 0.1,
-    }
+        max_tokens=VERDICT_MAX_TOKENS,
+    )
 
-    try:
-        print("start session")
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                url,
-                json=payload,
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "Content-Type": "application/json",
-                },
-                ssl=False,
-                timeout=aiohttp.ClientTimeout(total=30),
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data["choices"][0]["message"]["content"].strip()
-                return f"Ошибка API: {response.status}"
 
-    except Exception as e:
-        print(f"Ошибка запроса: {e}")
-        return "Ошибка соединения"
+async def explain_post(post_text: str) -> str | None:
+    """Признаки мошенничества и уровень риска для поста, None при ошибке"""
+    response = await _chat_completion(
+        [
+            {"role": "system", "content": EXPLAIN_SYSTEM_PROMPT},
+            {"role": "user", "content": EXPLAIN_USER_PROMPT.format(post_text=post_text[:MAX_POST_CHARS])},
+        ],
+        max_tokens=EXPLANATION_MAX_TOKENS,
+    )
+    return None if is_api_error(response) else response
 
 
-async def check_post(post_text: str) -> bool:
-    """Проверяет, содержит ли текст мошенническую схему"""
+class VerdictUnavailable(Exception):
+    """GigaChat не дал вердикт, пост должен остаться непроверенным"""
+
+
+def is_api_error(response: str) -> bool:
+    """analyze_post_with_gigachat сообщает об ошибках текстом, а не вердиктом"""
+    return response.startswith("Ошибка")
+
+
+def parse_verdict(response) -> bool | None:
+    """
+    Вердикт из ответа модели: "Да.", "нет, ..." и {"answer": "да"} разбираются,
+    на всё остальное возвращается None
+    """
+    text = str(response or "").strip()
+    if text.startswith("{"):
+        try:
+            text = str(json.loads(text).get("answer", ""))
+        except (json.JSONDecodeError, AttributeError):
+            return None
+    match = VERDICT_RE.match(text)
+    if not match:
+        return None
+    return match.group(1).lower() in ("да", "yes")
+
+
+async def classify_post(post_text: str):
+    """
+    Проверяет текст и возвращает вердикт вместе с ответом модели
+
+    Returns:
+        tuple: (is_scam, ответ модели или текст ошибки). is_scam равен None,
+            если вердикт получить не удалось
+    """
     try:
         print("in check")
         response = await analyze_post_with_gigachat(post_text)
         print(response)
-        return response.lower() == "да"
+        if is_api_error(response):
+            return None, response
+        verdict = parse_verdict(response)
+        if verdict is None:
+            return None, f"Ошибка разбора ответа: {response}"
+        return verdict, response
     except Exception as e:
         print(f"Ошибка при проверке поста: {e}")
-        return False
+        return None, f"Ошибка: {e}"
+
+
+def estimate_tokens(text: str) -> int:
+    """Грубая оценка: в русском тексте около трёх символов на токен"""
+    return len(text) // 3 + 1
+
+
+def parse_batch_answer(response: str, count: int) -> dict:
+    """
+    Вердикты из ответа на пакетный запрос
+
+    Returns:
+        dict: Номер поста (с 1) -> (is_scam, ответ) для разобранных элементов
+    """
+    start, end = response.find("["), response.rfind("]")
+    if start == -1 or end < start:
+        return {}
+    try:
+        items = json.loads(response[start:end + 1])
+    except json.JSONDecodeError:
+        return {}
+
+    verdicts = {}
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        post_id = item.get("id")
+        answer = str(item.get("answer", ""))
+        verdict = parse_verdict(answer)
+        if isinstance(post_id, int) and 1 <= post_id <= count and verdict is not None:
+            verdicts[post_id] = (verdict, answer)
+    return verdicts
+
+
+async def classify_posts_batch(post_texts: list) -> list:
+    """
+    Проверяет несколько постов одним запросом
+
+    Посты, для которых ответ не удалось разобрать, проверяются по одному.
+
+    Returns:
+        list: (is_scam или None, ответ модели или текст ошибки) для каждого поста
+    """
+    if len(post_texts) == 1:
+        return [await classify_post(post_texts[0])]
+
+    posts = "\n".join(
+        BATCH_POST_TEMPLATE.format(id=i, text=text[:MAX_POST_CHARS])
+        for i, text in enumerate(post_texts, start=1)
+    )
+    response = await _chat_completion(
+        [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": BATCH_USER_PROMPT.format(posts=posts)},
+        ],
+        max_tokens=BATCH_ITEM_MAX_TOKENS * len(post_texts) + 10,
+    )
+    if is_api_error(response):
+        # Повтор по одному при ошибке API только умножит неудачные запросы
+        return [(None, response)] * len(post_texts)
+
+    verdicts = parse_batch_answer(response, len(post_texts))
+    missing = [i for i in range(1, len(post_texts) + 1) if i not in verdicts]
+    if missing:
+        logger.warning(
+            f"Пакетный ответ разобран не полностью, по одному проверяется {len(missing)} постов"
+        )
+        singles = await asyncio.gather(*(classify_post(post_texts[i - 1]) for i in missing))
+        verdicts.update(zip(missing, singles))
+    return [verdicts[i] for i in range(1, len(post_texts) + 1)]
+
+
+class PostBatcher:
+    """
+    Collects posts from concurrent checks into batched GigaChat requests
+
+    A batch is sent when it has max_posts posts, when the next post would
+    exceed the token budget, or max_wait seconds after its first post.
+    """
+
+    def __init__(
+        self,
+        max_posts: int = GIGACHAT_BATCH_SIZE,
+        token_budget: int = GIGACHAT_BATCH_TOKEN_BUDGET,
+        max_wait: float = GIGACHAT_BATCH_WAIT,
+    ):
+        self.max_posts = max_posts
+        self.token_budget = token_budget
+        self.max_wait = max_wait
+        self._pending = []
+        self._tokens = 0
+        self._timer = None
+        self._tasks = set()
+
+    async def classify(self, post_text: str):
+        """Same result as classify_post, but the request is shared with other posts"""
+        if self.max_posts <= 1:
+            return await classify_post(post_text)
+
+        tokens = estimate_tokens((post_text or "")[:MAX_POST_CHARS])
+        if self._pending and self._tokens + tokens > self.token_budget:
+            self._flush()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((post_text or "", future))
+        self._tokens += tokens
+        if len(self._pending) >= self.max_posts:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._tokens = self._pending, [], 0
+        if batch:
+            task = asyncio.create_task(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch):
+        try:
+            results = await classify_posts_batch([text for text, _ in batch])
+        except Exception as e:
+            results = [(None, f"Ошибка: {e}")] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+post_batcher = PostBatcher()
+
+
+async def check_post(post_text: str) -> bool:
+    """Проверяет, содержит ли текст мошенническую схему"""
+    is_scam, _ = await classify_post(post_text)
+    return bool(is_scam)
 
 
 # async def start_checking(interval: int = 300):
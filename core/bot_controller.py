@@ -22,18 +22,26 @@ from database.db_commands import (
     get_unchecked_posts_count,
     export_data_to_excel,
     get_stats,
-    get_unchecked_posts,
-    mark_post_as_checked,
     add_channel,
     save_new_channels,
     get_posts_for_search,
     get_channel_links,
     get_blacklist_pat_reason,
-    add_to_blacklist
+    add_to_blacklist,
+    get_unfinished_backfills,
 )
 
-from core.parser import parse_all_active_channels, parse_channel
-from core.ai_filter import check_post
+from core.parser import (
+    parse_all_active_channels,
+    parse_channel,
+    parse_channels,
+    running_backfills,
+)
+from core.pipeline import run_pipeline
+from core.checking import check_unchecked_posts
+from core.progress import ProgressReporter
+from core.prefilter import prefilter
+from core.local_classifier import local_classifier
 from core.states import ChannelStates, PostCheck, BlockAdd
 
 # Настройка логирования
@@ -73,7 +81,7 @@ def get_main_keyboard():
             [KeyboardButton(text="✅ Добавить канал для проверки"), KeyboardButton(text="👀 Парсинг постов")],
             [KeyboardButton(text="🔄 Проверить посты на м. схемы"), KeyboardButton(text="📤 Выгрузить данные")],
             [KeyboardButton(text="🔍 Найти новые каналы"), KeyboardButton(text="📊 Статистика")],
-            [KeyboardButton(text="/blacklist")]
+            [KeyboardButton(text="/blacklist"), KeyboardButton(text="/backfills")]
         ],
         resize_keyboard=True
     )
@@ -86,6 +94,20 @@ def get_stop_keyboard():
     )
 
 # Define the parse_channel_keyboard as a variable
+async def start_parse_progress(message: Message, title: str):
+    """Status message for a parsing run and the on_progress callback that updates it"""
+    reporter = await ProgressReporter(message, title, label="Сохранено").start()
+
+    async def on_progress(progress):
+        await reporter.update(
+            progress["saved"],
+            progress["errors"],
+            f"Каналов обработано: {progress['channels']}",
+        )
+
+    return reporter, on_progress
+
+
 parse_channel_keyboard = InlineKeyboardMarkup(
     inline_keyboard=[
         [InlineKeyboardButton(text="Парсить канал сейчас", callback_data="inplace_parse_channel")],
@@ -187,6 +209,7 @@ async def parse_posts_handler(message: Message):
     - Last N posts
     - Last N months
     - All posts
+    - Last N posts with AI checking on the fly
     """
     logger.info(f"Пользователь {message.from_user.id} выбрал парсинг постов")
     # Создаем клавиатуру для выбора режима парсинга
@@ -199,7 +222,8 @@ async def parse_posts_handler(message: Message):
             [
                 KeyboardButton(text="📚 Все посты"),
                 KeyboardButton(text="❌ Отмена")
-            ]
+            ],
+            [KeyboardButton(text="⚡ Парсинг с проверкой")]
         ],
         resize_keyboard=True
     )
@@ -210,9 +234,14 @@ async def parse_posts_handler(message: Message):
 @router.message(F.text == "📥 Последние 50 постов")
 async def parse_latest_posts(message: Message):
     logger.info(f"Пользователь {message.from_user.id} выбрал парсинг последних 50 постов")
-    await message.answer("🔍 Подключаюсь к Telegram для парсинга последних постов...")
+    reporter, on_progress = await start_parse_progress(
+        message, "🔍 Парсинг последних постов"
+    )
     try:
-        total_saved = await parse_all_active_channels(limit_per_channel=50)
+        total_saved = await parse_all_active_channels(
+            limit_per_channel=50, incremental=True, on_progress=on_progress
+        )
+        await reporter.flush()
         print(f"Парсинг завершен. Сохранено постов: {total_saved}")
         logger.info(f"Парсинг завершен. Сохранено постов: {total_saved}")
         if total_saved > 0:
@@ -227,6 +256,46 @@ async def parse_latest_posts(message: Message):
                             reply_markup=get_main_keyboard())
 
 
+@router.message(F.text == "⚡ Парсинг с проверкой")
+async def parse_and_check_posts(message: Message):
+    logger.info(f"Пользователь {message.from_user.id} выбрал парсинг с проверкой")
+    await message.answer(
+        "⚡ Начинаю парсинг с проверкой...",
+        reply_markup=get_stop_keyboard(),
+    )
+    reporter = await ProgressReporter(
+        message, "🔍 Парсю последние посты и сразу проверяю их на м. схемы", label="Проверено"
+    ).start()
+
+    async def on_progress(stats):
+        await reporter.update(
+            stats["checked"],
+            details=f"Сохранено: {stats['saved']}, мошеннических: {stats['scam']}",
+        )
+
+    global STOP_CHECKING_FLAG
+    STOP_CHECKING_FLAG = False
+    try:
+        stats = await run_pipeline(
+            limit_per_channel=50,
+            incremental=True,
+            should_stop=lambda: STOP_CHECKING_FLAG,
+            on_progress=on_progress,
+        )
+        await reporter.flush()
+        logger.info(f"Парсинг с проверкой завершен: {stats}")
+        await message.answer(
+            f"✅ Готово. Сохранено постов: {stats['saved']}\n"
+            f"🔍 Проверено: {stats['checked']}\n"
+            f"🚨 Мошеннические схемы: {stats['scam']}",
+            reply_markup=get_main_keyboard(),
+        )
+    except Exception as e:
+        logger.error(f"Ошибка при парсинге с проверкой: {str(e)}")
+        await message.answer("❗ Произошла ошибка при парсинге каналов.", 
+                            reply_markup=get_main_keyboard())
+
+
 @router.message(F.text == "📅 За период")
 async def parse_by_period(message: Message):
     logger.info(f"Пользователь {message.from_user.id} выбрал парсинг за период")
@@ -250,9 +319,12 @@ async def parse_months(message: Message):
     months = months_map[message.text]
     
     logger.info(f"Пользователь {message.from_user.id} выбрал парсинг за {months} месяцев")
-    await message.answer(f"🔍 Начинаю парсинг за последние {months} месяца(ев)...")
+    reporter, on_progress = await start_parse_progress(
+        message, f"🔍 Парсинг за последние {months} месяца(ев)"
+    )
     try:
-        total_saved = await parse_all_active_channels(months=months)
+        total_saved = await parse_all_active_channels(months=months, on_progress=on_progress)
+        await reporter.flush()
         print(f"Парсинг за {months} месяцев завершен. Сохранено постов: {total_saved}")
         logger.info(f"Парсинг за {months} месяцев завершен. Сохранено постов: {total_saved}")
         if total_saved > 0:
@@ -286,9 +358,12 @@ async def parse_all_posts(message: Message):
 @router.message(F.text == "✅ Подтвердить")
 async def confirm_full_parse(message: Message):
     logger.info(f"Пользователь {message.from_user.id} подтвердил полный парсинг")
-    await message.answer("🔍 Начинаю полный парсинг всех каналов...")
+    reporter, on_progress = await start_parse_progress(
+        message, "🔍 Полный парсинг всех каналов"
+    )
     try:
-        total_saved = await parse_all_active_channels(all_time=True)
+        total_saved = await parse_all_active_channels(all_time=True, on_progress=on_progress)
+        await reporter.flush()
         print(f"Полный парсинг завершен. Сохранено постов: {total_saved}")
         logger.info(f"Полный парсинг завершен. Сохранено постов: {total_saved}")
         if total_saved > 0:
@@ -303,6 +378,66 @@ async def confirm_full_parse(message: Message):
                             reply_markup=get_main_keyboard())
 
 
+@router.message(Command("backfills"))
+async def show_backfills(message: Message):
+    logger.info(f"Пользователь {message.from_user.id} запросил прерванные полные парсинги")
+    backfills = [
+        backfill
+        for backfill in await get_unfinished_backfills()
+        if backfill.channel_link not in running_backfills
+    ]
+    if not backfills:
+        await message.answer("ℹ️ Прерванных полных парсингов нет")
+        return
+
+    lines = []
+    buttons = []
+    for backfill in backfills:
+        progress = ""
+        if backfill.start_post_id and backfill.offset_id:
+            progress = f", ~{100 * (1 - backfill.offset_id / backfill.start_post_id):.0f}%"
+        lines.append(
+            f"• {backfill.channel_link}: {backfill.fetched_count} сообщений{progress}, "
+            f"обновлён {backfill.updated_at:%d.%m.%Y %H:%M}"
+        )
+        buttons.append(
+            [
+                InlineKeyboardButton(
+                    text=f"▶️ {backfill.channel_link}",
+                    callback_data=f"resume_backfill:{backfill.channel_link}",
+                )
+            ]
+        )
+    await message.answer(
+        "⏸ Прерванные полные парсинги:\n" + "\n".join(lines),
+        reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons),
+    )
+
+
+@router.callback_query(F.data.startswith("resume_backfill:"))
+async def resume_backfill(callback_query: CallbackQuery):
+    channel = callback_query.data.split(":", 1)[1]
+    logger.info(f"Пользователь {callback_query.from_user.id} продолжил полный парсинг {channel}")
+    await callback_query.answer()
+    if channel in running_backfills:
+        await callback_query.message.answer(f"ℹ️ Парсинг {channel} уже идёт")
+        return
+    reporter, on_progress = await start_parse_progress(
+        callback_query.message, f"🔍 Продолжаю полный парсинг {channel}"
+    )
+    try:
+        result = await parse_channels([channel], all_time=True, on_progress=on_progress)
+        await reporter.flush()
+        await callback_query.message.answer(
+            f"✅ Полный парсинг {channel} завершён. Сохранено постов: {result[channel]}",
+            reply_markup=get_main_keyboard(),
+        )
+    except Exception as e:
+        logger.error(f"Ошибка при продолжении полного парсинга {channel}: {str(e)}")
+        await callback_query.message.answer("❗ Произошла ошибка при парсинге канала.",
+                                            reply_markup=get_main_keyboard())
+
+
 @router.message(F.text == "❌ Отмена")
 async def cancel_parsing(message: Message):
     logger.info(f"Пользователь {message.from_user.id} отменил парсинг")
@@ -331,40 +466,37 @@ async def check_new_posts(message: Message, state: FSMContext):
 
 
 async def process_unchecked_posts(message: Message, total_count: int):
-    checked_count = 0
-    batch_size = 1
+    reporter = await ProgressReporter(
+        message, "🔍 Проверка постов", total=total_count, label="Проверено"
+    ).start()
+
+    async def report_progress(stats):
+        await reporter.update(
+            stats["checked"] + stats["errors"],
+            stats["errors"],
+            f"Мошеннических: {stats['scam']}",
+        )
+
     try:
-        while not STOP_CHECKING_FLAG:
-            posts = await get_unchecked_posts(limit=batch_size)
-            if not posts:
-                logger.info("Все посты проверены")
-                break
-            for post_id, post_text in posts:
-                if STOP_CHECKING_FLAG:
-                    logger.info("Проверка постов остановлена пользователем")
-                    break
-                is_recipe = await check_post(post_text)
-                await mark_post_as_checked(post_id, is_recipe)
-                checked_count += 1
-                print(f"Проверено {checked_count}/{total_count} постов. Осталось: {total_count-checked_count}")
-                logger.info(f"Проверено {checked_count}/{total_count} постов. Осталось: {total_count-checked_count}")
-                await message.answer(
-                    f"🔍 Проверено {checked_count}/{total_count} постов...",
-                    reply_markup=get_stop_keyboard(),
-                )
-            await asyncio.sleep(1)
+        stats = await check_unchecked_posts(
+            should_stop=lambda: STOP_CHECKING_FLAG, on_progress=report_progress
+        )
+        await reporter.flush()
+        checked_count = stats["checked"]
+        errors = f", ошибок: {stats['errors']}" if stats["errors"] else ""
         if STOP_CHECKING_FLAG:
             print(f"Проверка прервана. Проверено {checked_count}/{total_count} постов")
             logger.info(f"Проверка прервана. Проверено {checked_count}/{total_count} постов")
             await message.answer(
-                f"⏹ Проверка прервана. Проверено {checked_count}/{total_count} постов.",
+                f"⏹ Проверка прервана. Проверено {checked_count}/{total_count} постов{errors}.",
                 reply_markup=get_main_keyboard(),
             )
         else:
             print(f"Проверка завершена. Обработано {checked_count} постов")
             logger.info(f"Проверка завершена. Обработано {checked_count} постов")
             await message.answer(
-                f"✅ Проверка завершена! Обработано {checked_count} постов.",
+                f"✅ Проверка завершена! Обработано {checked_count} постов, "
+                f"мошеннических: {stats['scam']}{errors}.",
                 reply_markup=get_main_keyboard(),
             )
     except Exception as e:
@@ -395,7 +527,18 @@ async def export_data(message: Message):
     count = await get_unchecked_posts_count()
     logger.debug(f"Количество непроверенных постов: {count}")
     if count > 0:
-        file_path = await export_data_to_excel()
+        stats = await get_stats()
+        reporter = await ProgressReporter(
+            message,
+            "📤 Выгрузка данных",
+            total=stats["total_posts"],
+            unit="строк",
+            label="Выгружено",
+        ).start()
+        file_path = await export_data_to_excel(
+            on_progress=lambda rows: reporter.update(rows)
+        )
+        await reporter.flush()
         print(f"Данные выгружены в файл: {file_path}")
         logger.info(f"Данные выгружены в файл: {file_path}")
         await message.answer_document(FSInputFile(file_path), caption="📁 Ваши данные")
@@ -439,9 +582,39 @@ async def show_stats(message: Message):
         f"• Мошеннические схемы : {stats['recipes']}\n"
         f"• Непроверенных: {stats['unchecked']}"
     )
+    if prefilter.stats:
+        rules = "\n".join(
+            f"  {rule}: {count}" for rule, count in prefilter.stats.most_common()
+        )
+        text += f"\n• Префильтр с запуска бота:\n{rules}"
     await message.answer(text)
 
 
+@router.message(Command("retrain"))
+async def retrain_local_model(message: Message):
+    logger.info(f"Пользователь {message.from_user.id} запустил обучение локальной модели")
+    await message.answer("🧠 Обучаю локальную модель на проверенных постах...")
+    try:
+        report = await local_classifier.retrain()
+        await message.answer(f"📈 {report}")
+    except Exception as e:
+        logger.error(f"Ошибка при обучении локальной модели: {str(e)}")
+        await message.answer(f"❌ Ошибка при обучении модели: {e}")
+
+
+@router.message(Command("activate_model"))
+async def activate_local_model(message: Message):
+    logger.info(f"Пользователь {message.from_user.id} включает модель-кандидат")
+    try:
+        if await local_classifier.activate():
+            await message.answer("✅ Модель-кандидат включена")
+        else:
+            await message.answer("ℹ️ Нет модели-кандидата, сначала запустите /retrain")
+    except Exception as e:
+        logger.error(f"Ошибка при включении локальной модели: {str(e)}")
+        await message.answer(f"❌ Ошибка при включении модели: {e}")
+
+
 async def search_new_channels() -> List[str]:
     logger.info("Запущен поиск новых каналов")
     CHANNEL_REGEX = r"(?:https?://)?(?:t\.me/|@)([a-zA-Z0-9_]{5,32})"
@@ -0,0 +1,67 @@
+import logging
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from pyrogram.errors import PeerIdInvalid, ChannelInvalid
+from pyrogram.raw.types import InputPeerChannel
+
+from config import CHAT_CACHE_TTL_DAYS
+from database.db_commands import get_resolved_chat, save_resolved_chat
+
+
+logger = logging.getLogger(__name__)
+
+# Ошибки, после которых сохранённый access_hash считается устаревшим
+PEER_ERRORS = (PeerIdInvalid, ChannelInvalid)
+
+
+class ResolvedChat(NamedTuple):
+    id: int
+    title: str
+    cached: bool
+
+
+async def resolve_chat(client, channel_link: str, username: str) -> ResolvedChat:
+    """
+    Resolve a channel, using the id and access hash stored on its row if possible
+
+    The cached peer is put into the Pyrogram session storage, so history
+    requests by id work without a username lookup. Access hashes are bound
+    to an account, so the cache is used only by the account that resolved it.
+
+    Args:
+        client: Telegram account
+        channel_link (str): Channel link as stored in the channels table
+        username (str): Channel username to resolve on a cache miss
+
+    Returns:
+        ResolvedChat: Chat id, title and whether it came from the cache
+    """
+    cached = await get_resolved_chat(channel_link)
+    if (
+        cached
+        and cached.access_hash is not None
+        and cached.resolved_by == client.name
+        and cached.resolved_at > datetime.now() - timedelta(days=CHAT_CACHE_TTL_DAYS)
+    ):
+        await client.storage.update_peers(
+            [(cached.chat_id, cached.access_hash, "channel", username.lower(), None)]
+        )
+        return ResolvedChat(cached.chat_id, cached.title, cached=True)
+
+    chat = await client.get_chat(username)
+    try:
+        peer = await client.storage.get_peer_by_id(chat.id)
+    except KeyError:
+        peer = None
+    if isinstance(peer, InputPeerChannel):
+        await save_resolved_chat(
+            channel_link, chat.id, peer.access_hash, chat.title, client.name
+        )
+    return ResolvedChat(chat.id, chat.title, cached=False)
+
+
+async def forget_chat(channel_link: str):
+    """Drop the cached peer, the next parse resolves the channel again"""
+    logger.info(f"Resolved chat cache of {channel_link} is invalid, resolving again")
+    await save_resolved_chat(channel_link, None, None, None, None)
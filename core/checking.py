@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import os
+import uuid
+
+from config import (
+    NEAR_DUPLICATE_MIN_SIMILARITY,
+    CHECK_CONCURRENCY,
+    CHECK_LEASE_SECONDS,
+    CHECK_WORKER_NAME,
+)
+from core.ai_filter import (
+    post_batcher,
+    explain_post,
+    VerdictUnavailable,
+    GIGACHAT_EXPLAIN_POSITIVES,
+)
+from core.verdict_cache import verdict_cache
+from core.prefilter import prefilter
+from core.local_classifier import local_classifier
+from database.db_commands import (
+    find_near_duplicate_verdict,
+    mark_post_as_checked,
+    claim_unchecked_posts,
+    release_posts,
+)
+from utils.minhash import lsh_bands
+
+
+logger = logging.getLogger(__name__)
+
+
+def new_worker_id() -> str:
+    """Unique id of one checking run, stored in Post.claimed_by"""
+    return f"{CHECK_WORKER_NAME}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+async def check_and_mark(post_id, post_text, local_score=None) -> bool:
+    """
+    Classify one post and store the verdict.
+
+    Posts cleared by the prefilter, posts whose normalized text was already
+    classified, near-duplicates of already checked posts and posts the local
+    model is sure about get a verdict without calling GigaChat.
+
+    local_score is the local model probability if the caller has already
+    scored the post in a batch.
+
+    Raises:
+        VerdictUnavailable: If GigaChat gave no verdict; the post stays unchecked
+    """
+    screened = prefilter.check(post_text)
+    if screened.verdict is not None:
+        await mark_post_as_checked(
+            post_id, screened.verdict, verdict_source=f"prefilter:{screened.rule}"
+        )
+        return screened.verdict
+
+    cached = await verdict_cache.get(post_text)
+    if cached is not None:
+        await mark_post_as_checked(post_id, cached, verdict_source="cache")
+        return cached
+
+    bands = lsh_bands(post_text)
+    if bands is not None:
+        twin = await find_near_duplicate_verdict(
+            post_text, bands, exclude_id=post_id, min_similarity=NEAR_DUPLICATE_MIN_SIMILARITY
+        )
+        if twin is not None:
+            twin_id, is_scam = twin
+            logger.info(f"Пост {post_id} похож на пост {twin_id}, вердикт унаследован")
+            await mark_post_as_checked(
+                post_id, is_scam, verdict_source=f"near_duplicate:{twin_id}"
+            )
+            return is_scam
+
+    if local_score is None:
+        local_score = local_classifier.score_many([post_text])[0]
+    local_verdict = local_classifier.decide(local_score)
+    if local_verdict is not None:
+        await mark_post_as_checked(post_id, local_verdict, verdict_source="local_model")
+        return local_verdict
+
+    is_scam, answer = await post_batcher.classify(post_text)
+    if is_scam is None:
+        # Без вердикта пост не помечается и попадёт в следующую проверку
+        raise VerdictUnavailable(answer)
+    await verdict_cache.put(post_text, is_scam, answer)
+    explanation = None
+    if is_scam and GIGACHAT_EXPLAIN_POSITIVES:
+        explanation = await explain_post(post_text)
+    await mark_post_as_checked(
+        post_id, is_scam, verdict_source="llm", explanation=explanation
+    )
+    return is_scam
+
+
+async def check_unchecked_posts(
+    concurrency=CHECK_CONCURRENCY,
+    should_stop=None,
+    on_progress=None,
+    lease_seconds=CHECK_LEASE_SECONDS,
+):
+    """
+    Check all unchecked posts with several checks in flight at once
+
+    Posts are leased from the DB page by page and handed to `concurrency`
+    workers, so several runs (in this process or on other hosts) check
+    disjoint posts. A failed post keeps its lease for lease_seconds, so it
+    is not retried right away; if the run lasts longer than that, the same
+    run claims and checks it again. After a stop request the checks already
+    in flight finish; at the end the remaining leases are released and
+    those posts stay unchecked.
+
+    Args:
+        concurrency (int): How many posts are checked at the same time
+        should_stop (callable): Returns True when checking has to stop
+        on_progress (callable): Async callable that gets the counters after every post
+        lease_seconds (int): How long a claimed post stays leased to this run
+
+    Returns:
+        dict: Counters of checked, scam and failed posts
+    """
+    stats = {"checked": 0, "scam": 0, "errors": 0}
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    worker_id = new_worker_id()
+
+    def stopped():
+        return bool(should_stop and should_stop())
+
+    async def produce():
+        try:
+            while not stopped():
+                posts = await claim_unchecked_posts(
+                    worker_id, limit=concurrency * 10, lease_seconds=lease_seconds
+                )
+                if not posts:
+                    break
+                # Локальная модель оценивает всю страницу одним вызовом
+                scores = local_classifier.score_many([text for _, text in posts])
+                for (post_id, post_text), score in zip(posts, scores):
+                    await queue.put((post_id, post_text, score))
+        finally:
+            for _ in range(concurrency):
+                await queue.put(None)
+
+    async def work():
+        while (item := await queue.get()) is not None:
+            if stopped():
+                continue
+            post_id, post_text, score = item
+            try:
+                is_scam = await check_and_mark(post_id, post_text, local_score=score)
+                stats["checked"] += 1
+                stats["scam"] += int(is_scam)
+            except Exception as e:
+                stats["errors"] += 1
+                logger.error(f"Ошибка при проверке поста {post_id}: {e}")
+            if on_progress:
+                await on_progress(stats)
+
+    try:
+        await asyncio.gather(produce(), *(work() for _ in range(concurrency)))
+    finally:
+        await release_posts(worker_id)
+    return stats
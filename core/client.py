@@ -1,9 +1,30 @@
 from pyrogram import Client
-from config import TELEGRAM_API_ID, TELEGRAM_API_HASH
-
-
-telegram_client = Client(
-    "data/user_session",
+from config import (
     TELEGRAM_API_ID,
     TELEGRAM_API_HASH,
+    TELEGRAM_SESSIONS,
+    TELEGRAM_MAX_FLOOD_WAIT,
+)
+from core.client_pool import ClientPool
+from core.rate_limiter import RateLimitedClient
+
+
+# sleep_threshold=0: все FloodWait уходят в лимитер, чтобы он подстраивал скорость.
+# У каждого аккаунта свои лимиты, поэтому и лимитер у каждого свой
+client_pool = ClientPool(
+    [
+        RateLimitedClient(
+            Client(
+                session.strip(),
+                TELEGRAM_API_ID,
+                TELEGRAM_API_HASH,
+                sleep_threshold=0,
+            ),
+            max_flood_wait=TELEGRAM_MAX_FLOOD_WAIT,
+        )
+        for session in TELEGRAM_SESSIONS
+    ]
 )
+
+# Основной аккаунт для одиночных запросов
+telegram_client = client_pool.clients[0]
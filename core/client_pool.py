@@ -0,0 +1,66 @@
+import asyncio
+import bisect
+import hashlib
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+def _ring_hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class ClientPool:
+    """
+    Several Telegram accounts with channels sharded between them.
+
+    Channels are assigned to accounts by consistent hashing, so adding or
+    removing an account moves only its share of channels. An account that is
+    in FloodWait is skipped and its channels go to the next account on the ring.
+    """
+
+    def __init__(self, clients: list, replicas: int = 100):
+        self.clients = list(clients)
+        self._ring = sorted(
+            (_ring_hash(f"{client.name}#{replica}"), index)
+            for index, client in enumerate(self.clients)
+            for replica in range(replicas)
+        )
+        self._keys = [key for key, _ in self._ring]
+
+    def __len__(self):
+        return len(self.clients)
+
+    def __iter__(self):
+        return iter(self.clients)
+
+    def _ring_order(self, channel: str) -> list:
+        """Accounts in ring order, starting from the owner of the channel"""
+        start = bisect.bisect(self._keys, _ring_hash(channel.lower()))
+        order = []
+        for offset in range(len(self._ring)):
+            index = self._ring[(start + offset) % len(self._ring)][1]
+            if index not in order:
+                order.append(index)
+                if len(order) == len(self.clients):
+                    break
+        return [self.clients[index] for index in order]
+
+    def owner_of(self, channel: str):
+        return self._ring_order(channel)[0]
+
+    def client_for(self, channel: str):
+        """The first account on the ring that is not in FloodWait"""
+        candidates = self._ring_order(channel)
+        for client in candidates:
+            if client.flood_wait_remaining() <= 0:
+                return client
+        return min(candidates, key=lambda client: client.flood_wait_remaining())
+
+    async def start(self):
+        await asyncio.gather(*(client.start() for client in self.clients))
+        logger.info(f"Запущено Telegram-аккаунтов: {len(self.clients)}")
+
+    async def stop(self):
+        await asyncio.gather(*(client.stop() for client in self.clients))
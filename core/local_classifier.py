@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import os
+import zlib
+
+import numpy as np
+
+from config import (
+    LOCAL_MODEL_PATH,
+    LOCAL_MODEL_CLEAN_BELOW,
+    LOCAL_MODEL_SCAM_ABOVE,
+    LOCAL_MODEL_MIN_SAMPLES,
+)
+from core.verdict_cache import normalize_text
+from database.db_commands import get_labeled_posts
+from utils.linear_model import HashedLogisticRegression
+
+
+logger = logging.getLogger(__name__)
+
+# Каждый пятый текст (по хэшу, одинаковые тексты всегда в одной части) идёт в проверку
+HOLDOUT_EVERY = 5
+REPORT_THRESHOLDS = (0.1, 0.3, 0.5, 0.7, 0.9)
+
+
+def is_holdout(text: str) -> bool:
+    return zlib.crc32(normalize_text(text).encode("utf-8")) % HOLDOUT_EVERY == 0
+
+
+def precision_recall(labels: np.ndarray, predicted: np.ndarray):
+    true_positive = int(np.sum(predicted & labels))
+    precision = true_positive / max(int(predicted.sum()), 1)
+    recall = true_positive / max(int(labels.sum()), 1)
+    return precision, recall
+
+
+def evaluation_report(labels, probabilities, clean_below: float, scam_above: float) -> str:
+    """Precision/recall of the scam class by threshold and the effect of the LLM band"""
+    labels = np.asarray(labels, dtype=bool)
+    probabilities = np.asarray(probabilities)
+    lines = ["Порог | точность | полнота"]
+    for threshold in REPORT_THRESHOLDS:
+        precision, recall = precision_recall(labels, probabilities >= threshold)
+        lines.append(f"{threshold:.2f} | {precision:.3f} | {recall:.3f}")
+
+    clean = probabilities < clean_below
+    scam = probabilities >= scam_above
+    to_llm = ~(clean | scam)
+    lines.append(
+        f"Зона GigaChat [{clean_below}, {scam_above}): "
+        f"{to_llm.mean():.1%} постов ({int(to_llm.sum())} из {len(labels)})"
+    )
+    lines.append(
+        f"Без GigaChat: чистых {int(clean.sum())} (ошибок {int((clean & labels).sum())}), "
+        f"мошеннических {int(scam.sum())} (ошибок {int((scam & ~labels).sum())})"
+    )
+    return "\n".join(lines)
+
+
+class LocalClassifier:
+    """
+    Local tier of checking: a hashed n-gram logistic regression trained on
+    verdicts GigaChat has already given.
+
+    Posts scored below clean_below or at/above scam_above get the local
+    verdict, the uncertain middle band still goes to GigaChat. Until a
+    model is trained (or loaded from path) every post goes to GigaChat.
+    A retrained model is saved as a candidate next to path and is used
+    only after activate().
+    """
+
+    def __init__(
+        self,
+        path: str = LOCAL_MODEL_PATH,
+        clean_below: float = LOCAL_MODEL_CLEAN_BELOW,
+        scam_above: float = LOCAL_MODEL_SCAM_ABOVE,
+    ):
+        self.path = path
+        root, ext = os.path.splitext(path)
+        self.candidate_path = f"{root}.candidate{ext}"
+        self.clean_below = clean_below
+        self.scam_above = scam_above
+        self.model = None
+        self.training = False
+
+    def load(self) -> bool:
+        if not os.path.exists(self.path):
+            logger.info("Локальная модель не обучена, все посты проверяет GigaChat")
+            return False
+        self.model = HashedLogisticRegression.load(self.path)
+        return True
+
+    def score_many(self, texts) -> list:
+        """Scam probability of every text, or None for all if there is no model"""
+        if self.model is None:
+            return [None] * len(texts)
+        return self.model.predict_proba(texts).tolist()
+
+    def decide(self, score) -> bool | None:
+        """Local verdict for a score, None when GigaChat has to decide"""
+        if score is None:
+            return None
+        if score < self.clean_below:
+            return False
+        if score >= self.scam_above:
+            return True
+        return None
+
+    async def retrain(self) -> str:
+        """
+        Train a new model on labeled posts, evaluate it on the held-out part
+        and save it as the candidate. The live model does not change.
+
+        Returns:
+            str: Report for choosing the thresholds
+        """
+        if self.training:
+            return "Модель уже обучается"
+        self.training = True
+        try:
+            return await self._retrain()
+        finally:
+            self.training = False
+
+    async def _retrain(self) -> str:
+        rows = await get_labeled_posts()
+        labels = [bool(is_scam) for _, is_scam in rows]
+        if len(rows) < LOCAL_MODEL_MIN_SAMPLES or len(set(labels)) < 2:
+            return (
+                f"Недостаточно размеченных постов: {len(rows)} "
+                f"(нужно {LOCAL_MODEL_MIN_SAMPLES} и оба класса)"
+            )
+
+        train = [(text, label) for (text, _), label in zip(rows, labels) if not is_holdout(text)]
+        test = [(text, label) for (text, _), label in zip(rows, labels) if is_holdout(text)]
+
+        def fit_and_evaluate():
+            model = HashedLogisticRegression().fit(
+                [text for text, _ in train], [label for _, label in train]
+            )
+            probabilities = model.predict_proba([text for text, _ in test])
+            return model, probabilities
+
+        # Обучение занимает процессор, цикл событий бота не блокируем
+        model, probabilities = await asyncio.to_thread(fit_and_evaluate)
+        await asyncio.to_thread(model.save, self.candidate_path)
+
+        report = evaluation_report(
+            [label for _, label in test], probabilities, self.clean_below, self.scam_above
+        )
+        header = (
+            f"Обучено на {len(train)} постах "
+            f"(мошеннических: {sum(label for _, label in train)}), проверка на {len(test)}"
+        )
+        logger.info(f"Обучена модель-кандидат {self.candidate_path}. {header}")
+        return f"{header}\n{report}\nМодель-кандидат сохранена, включить: /activate_model"
+
+    async def activate(self) -> bool:
+        """
+        Replace the live model with the candidate saved by retrain.
+
+        Returns:
+            bool: True if there was a candidate to activate
+        """
+        if self.training or not os.path.exists(self.candidate_path):
+            return False
+        model = await asyncio.to_thread(HashedLogisticRegression.load, self.candidate_path)
+        os.replace(self.candidate_path, self.path)
+        self.model = model
+        logger.info(f"Модель-кандидат включена: {self.path}")
+        return True
+
+
+local_classifier = LocalClassifier()
@@ -1,20 +1,30 @@
 import asyncio
 from datetime import datetime
 
-from core.client import telegram_client
+from pyrogram.errors import FloodWait
+
+from config import PARSE_CONCURRENCY, PARSE_FLUSH_SIZE, BACKFILL_CHECKPOINT_EVERY
+from core.client import telegram_client, client_pool
+from core.chat_cache import resolve_chat, forget_chat, PEER_ERRORS
 from database.db_commands import (
-    save_post,
+    save_posts_many,
     get_active_channels,
+    get_last_post_id,
+    update_last_post_id,
+    get_backfill_checkpoint,
+    save_backfill_checkpoint,
     add_to_blacklist,
     is_blacklisted,
 )
 from utils.logger import setup_logger
 from constants.logger import LOG_DB
 from constants.db_constants import DEFAULT_PATTERNS
-from telethon.errors import FloodWaitError
 from datetime import timedelta
 logger = setup_logger(  )
 
+# Каналы, полный парсинг которых идёт прямо сейчас в этом процессе
+running_backfills = set()
+
 
 async def initialize_blacklist():
     """
@@ -34,39 +44,86 @@ async def initialize_blacklist():
             logger.error(LOG_DB["patter_error"].format(pattern=pattern, e=e))
 
 
-async def parse_channel(channel_name, months=None, all_time=False, limit=10):
+async def parse_channel(
+    channel_name,
+    months=None,
+    all_time=False,
+    limit=10,
+    incremental=False,
+    sink=None,
+    client=None,
+):
     """
     Parse channel posts with different time periods, including forwarded messages
-    
+
+    The newest message id of the channel is stored as a high-water mark. In
+    incremental mode only messages newer than the mark are fetched, the other
+    modes are used only while the channel has no mark yet.
+
+    Full (all_time) parsing saves a checkpoint every BACKFILL_CHECKPOINT_EVERY
+    messages and continues from it if the previous backfill of the channel
+    was interrupted.
+
     Args:
         channel_name (str): Channel name or link
         months (int): Number of months to parse (None by default)
         all_time (bool): Parse all posts if True (False by default)
         limit (int): Limit of posts to parse if months and all_time are False
+        incremental (bool): Fetch only posts newer than the stored mark (False by default)
+        sink (callable): Async callable that takes a batch of posts and returns
+            the saved count (save_posts_many by default)
+        client: Telegram account to use (the main account by default)
+
+    Raises:
+        FloodWait: If the account got a FloodWait too long to wait out
     """
     channel = channel_name.split("/")[-1] if "/" in channel_name else channel_name
-    
+    client = client or telegram_client
+    chat = None
+
     try:
-        chat = await telegram_client.get_chat(channel)
+        chat = await resolve_chat(client, channel_name, channel)
         logger.info(f"get chat {chat.title}, id - {chat.id}")
         saved_count = 0
+        last_post_id = await get_last_post_id(channel)
+        newest_post_id = None
+        reached_last_post = False
+
+        def is_already_parsed(message):
+            """Tracks the newest id and reports whether the stored mark is reached"""
+            nonlocal newest_post_id, reached_last_post
+            if last_post_id is not None and message.id <= last_post_id:
+                reached_last_post = True
+                return True
+            newest_post_id = max(newest_post_id or 0, message.id)
+            return False
         
-        async def process_message(message):
+        buffer = []
+
+        async def flush():
             nonlocal saved_count
-            # Save original message
-            saved = await save_post(
-                check_date=datetime.now(),
-                post_date=message.date,
-                channel_link=f"https://t.me/{channel_name}",
-                post_link=message.link,
-                post_text=message.text,
-                user_requested=0,
+            if not buffer:
+                return
+            batch = buffer.copy()
+            buffer.clear()
+            saved = await (sink or save_posts_many)(batch)
+            logger.info(
+                LOG_DB["save_posts"].format(saved=saved, total=len(batch), channel=channel)
             )
-            if saved:
-                logger.info(
-                    LOG_DB["save_post"].format(link=message.link, date=message.date)
+            saved_count += saved
+
+        async def process_message(message):
+            # Save original message
+            buffer.append(
+                dict(
+                    check_date=datetime.now(),
+                    post_date=message.date,
+                    channel_link=f"https://t.me/{channel_name}",
+                    post_link=message.link,
+                    post_text=message.text,
+                    user_requested=0,
                 )
-                saved_count += 1
+            )
 
             # Handle forwarded message
             if message.forward_from_chat or message.forward_from:
@@ -79,98 +136,232 @@ async def parse_channel(channel_name, months=None, all_time=False, limit=10):
                 if message.forward_from_chat:
                     forward_channel = f"https://t.me/{message.forward_from_chat.username or message.forward_from_chat.id}"
                 
-                saved = await save_post(
-                    check_date=datetime.now(),
-                    post_date=forward_date,
-                    channel_link=forward_channel or f"https://t.me/{channel_name}",
-                    post_link=forward_link,
-                    post_text=forward_text,
-                    user_requested=0,
-                    is_forwarded=True  # Add flag to indicate forwarded message
-                )
-                if saved:
-                    logger.info(
-                        LOG_DB["save_post"].format(link=forward_link, date=forward_date)
+                buffer.append(
+                    dict(
+                        check_date=datetime.now(),
+                        post_date=forward_date,
+                        channel_link=forward_channel or f"https://t.me/{channel_name}",
+                        post_link=forward_link,
+                        post_text=forward_text,
+                        user_requested=0,
                     )
-                    saved_count += 1
+                )
 
-        if all_time:
-            # Parse all posts with delay
-            async for message in telegram_client.get_chat_history(chat.id):
-                await asyncio.sleep(0.5)  # Delay between requests
+            if len(buffer) >= PARSE_FLUSH_SIZE:
+                await flush()
+
+        if incremental and last_post_id is not None:
+            # Parse only posts newer than the stored mark
+            async for message in client.get_chat_history(chat.id):
+                if is_already_parsed(message):
+                    break
                 await process_message(message)
+
+        elif all_time:
+            # Parse all posts, saving checkpoints to resume after restarts
+            checkpoint = await get_backfill_checkpoint(channel)
+            if checkpoint and checkpoint.status != "done":
+                offset_id = checkpoint.offset_id
+                fetched = checkpoint.fetched_count
+                saved_before = checkpoint.saved_count
+                start_post_id = checkpoint.start_post_id
+                logger.info(f"Resuming backfill of {channel} from message {offset_id}")
+            else:
+                offset_id, fetched, saved_before, start_post_id = 0, 0, 0, None
+                await save_backfill_checkpoint(
+                    channel, offset_id=0, fetched_count=0, saved_count=0,
+                    start_post_id=None, status="running",
+                )
+
+            running_backfills.add(channel)
+            try:
+                async for message in client.get_chat_history(chat.id, offset_id=offset_id):
+                    is_already_parsed(message)
+                    await process_message(message)
+                    start_post_id = start_post_id or message.id
+                    fetched += 1
+                    if fetched % BACKFILL_CHECKPOINT_EVERY == 0:
+                        # Сначала пишем посты, потом двигаем чекпоинт
+                        await flush()
+                        await save_backfill_checkpoint(
+                            channel,
+                            offset_id=message.id,
+                            fetched_count=fetched,
+                            saved_count=saved_before + saved_count,
+                            start_post_id=start_post_id,
+                        )
+                await flush()
+                await save_backfill_checkpoint(
+                    channel,
+                    fetched_count=fetched,
+                    saved_count=saved_before + saved_count,
+                    start_post_id=start_post_id,
+                    status="done",
+                )
+            finally:
+                running_backfills.discard(channel)
                     
         elif months:
             # Parse posts for last N months
             date_from = datetime.now() - timedelta(days=30*months)
-            async for message in telegram_client.get_chat_history(chat.id):
+            async for message in client.get_chat_history(chat.id):
                 if message.date < date_from:
                     break
+                is_already_parsed(message)
                 await process_message(message)  
         else:
             # Parse limited number of posts
-            async for message in telegram_client.get_chat_history(chat.id, limit=limit):
+            async for message in client.get_chat_history(chat.id, limit=limit):
+                is_already_parsed(message)
                 await process_message(message)   
+        await flush()
+
+        # Двигаем отметку, только если между ней и новыми постами нет пропуска
+        if newest_post_id and (last_post_id is None or reached_last_post):
+            await update_last_post_id(channel, newest_post_id)
         return saved_count
 
-    except FloodWaitError as e:
-        logger.error(f"FloodWaitError: waiting for {e.seconds} seconds")
-        await asyncio.sleep(e.seconds)
-        return await parse_channel(channel_name, months, all_time, limit)
-        
+    except FloodWait:
+        raise
+
+    except PEER_ERRORS as e:
+        if chat and chat.cached:
+            # access_hash из кэша устарел: резолвим канал заново и повторяем
+            await forget_chat(channel_name)
+            return await parse_channel(
+                channel_name, months, all_time, limit, incremental, sink, client
+            )
+        logger.error(LOG_DB["parse_error"].format(e=e))
+        return 0
+
     except Exception as e:
         logger.error(LOG_DB["parse_error"].format(e=e))
         return 0
-async def parse_all_active_channels(months=None, all_time=False, limit_per_channel=10):
+
+
+async def parse_channels(
+    channels,
+    months=None,
+    all_time=False,
+    limit_per_channel=10,
+    concurrency=PARSE_CONCURRENCY,
+    incremental=False,
+    sink=None,
+    on_progress=None,
+):
+    """
+    Parse several channels concurrently
+
+    Args:
+        channels (list): Channel names or links
+        months (int): Number of months to parse (None by default)
+        all_time (bool): Parse all posts if True (False by default)
+        limit_per_channel (int): Limit of posts per channel if months and all_time are False
+        concurrency (int): How many channels are parsed at the same time on one account
+        incremental (bool): Fetch only posts newer than the stored mark (False by default)
+        sink (callable): Where batches of posts go (save_posts_many by default)
+        on_progress (callable): Async callable that gets the counters of finished
+            and failed channels and saved posts after every batch and channel
+
+    Returns:
+        dict: Saved posts count for every channel
+    """
+    # Каналы распределены по аккаунтам пула, у каждого аккаунта свой лимит параллельности
+    semaphores = {id(client): asyncio.Semaphore(max(1, concurrency)) for client in client_pool}
+    results = {}
+    progress = {"channels": 0, "errors": 0, "saved": 0}
+    channel_sink = sink
+
+    if on_progress:
+        async def channel_sink(batch):
+            saved = await (sink or save_posts_many)(batch)
+            progress["saved"] += saved
+            await on_progress(progress)
+            return saved
+
+    async def worker(channel):
+        saved = 0
+        # Каждый аккаунт пула плюс последняя попытка на том, что раньше освободится
+        for _ in range(len(client_pool) + 1):
+            client = client_pool.client_for(channel)
+            async with semaphores[id(client)]:
+                logger.info(LOG_DB["process"].format(channel=channel))
+                try:
+                    if all_time:
+                        logger.info(f"Parsing all posts from channel: {channel}")
+                    elif months:
+                        logger.info(f"Parsing last {months} months from channel: {channel}")
+                    else:
+                        logger.info(f"Parsing last {limit_per_channel} posts from channel: {channel}")
+                    saved = await parse_channel(
+                        channel,
+                        months=months,
+                        all_time=all_time,
+                        limit=limit_per_channel,
+                        incremental=incremental,
+                        sink=channel_sink,
+                        client=client,
+                    )
+                    break
+                except FloodWait as e:
+                    logger.warning(
+                        f"Account {client.name} is in FloodWait for {e.value}s, moving channel {channel}"
+                    )
+                except Exception as e:
+                    logger.error(LOG_DB["parse_error"].format(e=e))
+                    logger.error(f"Failed channel: {channel}, error: {str(e)}")
+                    progress["errors"] += 1
+                    break
+        else:
+            # Все аккаунты в FloodWait: канал не разобран, это ошибка запуска
+            logger.error(f"Failed channel: {channel}, every account is in FloodWait")
+            progress["errors"] += 1
+        results[channel] = saved
+        progress["channels"] += 1
+        if on_progress:
+            await on_progress(progress)
+
+    await asyncio.gather(*(worker(channel) for channel in channels))
+    return results
+
+
+async def parse_all_active_channels(
+    months=None,
+    all_time=False,
+    limit_per_channel=10,
+    concurrency=PARSE_CONCURRENCY,
+    incremental=False,
+    on_progress=None,
+):
     """
     Parse all active channels with specified parameters
-    
+
     Args:
         months (int): Number of months to parse (None by default)
         all_time (bool): Parse all posts if True (False by default)
         limit_per_channel (int): Limit of posts per channel if months and all_time are False
+        concurrency (int): How many channels are parsed at the same time
+        incremental (bool): Fetch only posts newer than the stored mark (False by default)
+        on_progress (callable): See parse_channels
+
+    Returns:
+        int: Total saved posts count, per-channel counts are logged
     """
     logger.info(LOG_DB["start_parse"])
-    total_saved = 0
     channels = await get_active_channels()
-    
-    for channel in channels:
-        try:
-            logger.info(LOG_DB["process"].format(channel=channel))
-            
-            # Добавляем обработку различных режимов парсинга
-            if all_time:
-                logger.info(f"Parsing all posts from channel: {channel}")
-                saved = await parse_channel(channel, all_time=True)
-            elif months:
-                logger.info(f"Parsing last {months} months from channel: {channel}")
-                saved = await parse_channel(channel, months=months)
-            else:
-                logger.info(f"Parsing last {limit_per_channel} posts from channel: {channel}")
-                saved = await parse_channel(channel, limit=limit_per_channel)
-                
-            total_saved += saved
-            
-            # Добавляем адаптивную задержку между каналами
-            delay = 5 if all_time else 2  # Увеличенная задержка при парсинге всех постов
-            logger.info(f"Waiting {delay} seconds before next channel...")
-            await asyncio.sleep(delay)
-            
-        except FloodWaitError as e:
-            logger.error(f"FloodWaitError for channel {channel}: waiting {e.seconds} seconds")
-            await asyncio.sleep(e.seconds)
-            # Можно добавить повторную попытку парсинга этого канала
-            try:
-                saved = await parse_channel(channel, months=months, all_time=all_time, limit=limit_per_channel)
-                total_saved += saved
-            except Exception as retry_e:
-                logger.error(f"Retry failed for channel {channel}: {retry_e}")
-                continue
-                
-        except Exception as e:
-            logger.error(LOG_DB["parse_error"].format(e=e))
-            logger.error(f"Failed channel: {channel}, error: {str(e)}")
-            continue
-            
+
+    per_channel = await parse_channels(
+        channels,
+        months=months,
+        all_time=all_time,
+        limit_per_channel=limit_per_channel,
+        concurrency=concurrency,
+        incremental=incremental,
+        on_progress=on_progress,
+    )
+    for channel, saved in per_channel.items():
+        logger.info(f"Channel {channel}: saved {saved} posts")
+
+    total_saved = sum(per_channel.values())
     logger.info(f"Total posts saved: {total_saved}")
-    return total_saved
\ No newline at end of file
+    return total_saved
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+
+from config import (
+    PARSE_CONCURRENCY,
+    PIPELINE_QUEUE_SIZE,
+    PIPELINE_CHECK_CONCURRENCY,
+    CHECK_LEASE_SECONDS,
+)
+from core.parser import parse_channels
+from core.checking import check_and_mark, new_worker_id
+from core.local_classifier import local_classifier
+from database.db_commands import get_active_channels, insert_new_posts, release_posts
+
+
+logger = logging.getLogger(__name__)
+
+# Маркер конца очереди
+_DONE = None
+
+
+async def run_pipeline(
+    months=None,
+    all_time=False,
+    limit_per_channel=10,
+    incremental=False,
+    fetch_concurrency=PARSE_CONCURRENCY,
+    check_concurrency=PIPELINE_CHECK_CONCURRENCY,
+    queue_size=PIPELINE_QUEUE_SIZE,
+    should_stop=None,
+    on_progress=None,
+):
+    """
+    Parse all active channels and check new posts in one streaming run
+
+    Parsed batches go through a bounded queue to the DB writer, and the
+    inserted posts go through a second bounded queue to the AI checkers.
+    When a queue is full the stage before it waits, so a slow stage slows
+    down the whole pipeline instead of piling posts up in memory. New posts
+    are inserted already leased to this run, so other checkers skip them.
+    The parser's sink returns only after the writer has stored its batch,
+    so channel marks and backfill checkpoints never run ahead of the DB.
+
+    Args:
+        months (int): Number of months to parse (None by default)
+        all_time (bool): Parse all posts if True (False by default)
+        limit_per_channel (int): Limit of posts per channel if months and all_time are False
+        incremental (bool): Fetch only posts newer than the stored mark (False by default)
+        fetch_concurrency (int): How many channels are parsed at the same time
+        check_concurrency (int): How many posts are checked at the same time
+        queue_size (int): Capacity of each queue between stages
+        should_stop (callable): Returns True when checking has to stop
+        on_progress (callable): Async callable that gets the counters after every checked post
+
+    Returns:
+        dict: Counters of saved, checked and scam posts
+    """
+    stats = {"saved": 0, "checked": 0, "scam": 0}
+    posts_queue = asyncio.Queue(maxsize=queue_size)
+    check_queue = asyncio.Queue(maxsize=queue_size * check_concurrency)
+    worker_id = new_worker_id()
+
+    async def enqueue_posts(batch):
+        # Парсер ждёт записи пачки: отметки канала двигаются только после неё
+        saved = asyncio.get_running_loop().create_future()
+        await posts_queue.put((batch, saved))
+        return await saved
+
+    async def fetch():
+        channels = await get_active_channels()
+        try:
+            await parse_channels(
+                channels,
+                months=months,
+                all_time=all_time,
+                limit_per_channel=limit_per_channel,
+                concurrency=fetch_concurrency,
+                incremental=incremental,
+                sink=enqueue_posts,
+            )
+        finally:
+            await posts_queue.put(_DONE)
+
+    async def write():
+        try:
+            while (item := await posts_queue.get()) is not _DONE:
+                batch, saved = item
+                # Ошибка одной пачки не должна остановить запись: иначе парсер
+                # заполнит очередь и будет ждать вечно
+                try:
+                    inserted = await insert_new_posts(
+                        batch,
+                        claimed_by=worker_id,
+                        lease_seconds=CHECK_LEASE_SECONDS,
+                        raise_errors=True,
+                    )
+                    if not saved.done():
+                        saved.set_result(len(inserted))
+                    stats["saved"] += len(inserted)
+                    scores = local_classifier.score_many([text for _, text in inserted])
+                    for (post_id, post_text), score in zip(inserted, scores):
+                        await check_queue.put((post_id, post_text, score))
+                except Exception as e:
+                    # Записанные, но не поставленные в проверку посты после
+                    # снятия аренды попадут в обычную проверку
+                    logger.error(f"Ошибка при сохранении пачки постов: {e}")
+                    if not saved.done():
+                        saved.set_exception(e)
+        finally:
+            # Незаписанные пачки не должны сдвинуть отметки каналов
+            while not posts_queue.empty():
+                item = posts_queue.get_nowait()
+                if item is not _DONE and not item[1].done():
+                    item[1].cancel()
+            for _ in range(check_concurrency):
+                await check_queue.put(_DONE)
+
+    async def check():
+        while (item := await check_queue.get()) is not _DONE:
+            if should_stop and should_stop():
+                # Пост остаётся непроверенным и попадёт в обычную проверку
+                continue
+            post_id, post_text, score = item
+            try:
+                is_scam = await check_and_mark(post_id, post_text, local_score=score)
+                stats["checked"] += 1
+                stats["scam"] += int(is_scam)
+            except Exception as e:
+                logger.error(f"Ошибка при проверке поста {post_id}: {e}")
+            if on_progress:
+                await on_progress(stats)
+
+    try:
+        await asyncio.gather(fetch(), write(), *(check() for _ in range(check_concurrency)))
+    finally:
+        await release_posts(worker_id)
+    logger.info(
+        f"Pipeline finished: saved {stats['saved']}, checked {stats['checked']}, scam {stats['scam']}"
+    )
+    return stats
@@ -0,0 +1,72 @@
+import re
+from collections import Counter
+from typing import NamedTuple
+
+from config import (
+    TRIGGER_WORDS,
+    PREFILTER_MIN_WORDS,
+    PREFILTER_SIGNAL_PATTERNS,
+    PREFILTER_CLEAR_WITHOUT_SIGNALS,
+)
+
+
+WORD_RE = re.compile(r"[^\W\d_]+")
+URL_RE = re.compile(r"(https?://|www\.|t\.me/)\S+", re.IGNORECASE)
+
+
+class PrefilterResult(NamedTuple):
+    # False - пост чистый и в LLM не идёт, None - решает LLM
+    verdict: bool | None
+    rule: str
+
+
+class Prefilter:
+    """
+    Cheap first tier of checking.
+
+    Trigger words and signal patterns are compiled into one regex with a
+    named group per rule, so a post is scanned once whatever the number of
+    rules. Empty posts, short posts and (optionally) posts without any
+    trigger or signal are cleared without the LLM, the rest go to it.
+    Every decision is counted by the rule that made it.
+    """
+
+    def __init__(
+        self,
+        trigger_words=TRIGGER_WORDS,
+        signal_patterns=PREFILTER_SIGNAL_PATTERNS,
+        min_words: int = PREFILTER_MIN_WORDS,
+        clear_without_signals: bool = PREFILTER_CLEAR_WITHOUT_SIGNALS,
+    ):
+        rules = [(f"trigger:{word}", re.escape(word)) for word in trigger_words]
+        rules += list(signal_patterns)
+        self.rule_names = {f"r{i}": name for i, (name, _) in enumerate(rules)}
+        self.pattern = re.compile(
+            "|".join(f"(?P<r{i}>{pattern})" for i, (_, pattern) in enumerate(rules)),
+            re.IGNORECASE,
+        ) if rules else None
+        self.min_words = min_words
+        self.clear_without_signals = clear_without_signals
+        self.stats = Counter()
+
+    def _decide(self, text: str | None) -> PrefilterResult:
+        if not text or not WORD_RE.search(text):
+            return PrefilterResult(False, "empty")
+
+        match = self.pattern.search(text) if self.pattern else None
+        if match:
+            return PrefilterResult(None, self.rule_names[match.lastgroup])
+
+        if len(WORD_RE.findall(URL_RE.sub(" ", text))) < self.min_words:
+            return PrefilterResult(False, "short")
+        if self.clear_without_signals:
+            return PrefilterResult(False, "no_signals")
+        return PrefilterResult(None, "no_signals")
+
+    def check(self, text: str | None) -> PrefilterResult:
+        result = self._decide(text)
+        self.stats[result.rule] += 1
+        return result
+
+
+prefilter = Prefilter()
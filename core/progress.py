@@ -0,0 +1,112 @@
+import logging
+import time
+
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
+from aiogram.types import Message
+
+from config import PROGRESS_EDIT_INTERVAL
+
+
+logger = logging.getLogger(__name__)
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600} ч {seconds % 3600 // 60} мин"
+    if seconds >= 60:
+        return f"{seconds // 60} мин {seconds % 60} с"
+    return f"{seconds} с"
+
+
+class ProgressReporter:
+    """
+    Progress of a long job in one status message that is edited in place.
+
+    update() can be called as often as the job likes: the message is edited
+    at most once per `interval` seconds and only when its text changes.
+    Telegram errors are logged and never break the job; after a flood-wait
+    the next edit is postponed by the time Telegram asked for.
+
+    Args:
+        message (Message): Message to answer with the status message
+        title (str): First line of the status, e.g. "🔍 Проверка постов"
+        total (int): Expected number of items, None if unknown (no % and ETA)
+        unit (str): Name of the items in the rate line
+        label (str): Name of the done counter, e.g. "Проверено"
+        interval (float): Minimum seconds between edits
+        clock (callable): Monotonic time source
+    """
+
+    def __init__(
+        self,
+        message: Message,
+        title: str,
+        total: int = None,
+        unit: str = "постов",
+        label: str = "Готово",
+        interval: float = PROGRESS_EDIT_INTERVAL,
+        clock=time.monotonic,
+    ):
+        self.message = message
+        self.title = title
+        self.total = total
+        self.unit = unit
+        self.label = label
+        self.interval = interval
+        self.clock = clock
+        self.status = None
+        self.started = clock()
+        self.done = 0
+        self.errors = 0
+        self.details = ""
+        self._text = None
+        self._next_edit = 0.0
+
+    def render(self) -> str:
+        elapsed = max(self.clock() - self.started, 1e-9)
+        rate = self.done / elapsed
+        counter = f"{self.label}: {self.done}"
+        if self.total:
+            counter += f"/{self.total} ({min(self.done / self.total, 1):.0%})"
+        lines = [self.title, counter]
+
+        speed = f"Скорость: {rate:.1f} {self.unit}/с"
+        if self.total and rate > 0 and self.done < self.total:
+            speed += f", осталось ~{format_duration((self.total - self.done) / rate)}"
+        lines.append(speed)
+        if self.errors:
+            lines.append(f"Ошибок: {self.errors}")
+        if self.details:
+            lines.append(self.details)
+        return "\n".join(lines)
+
+    async def start(self):
+        """Send the status message; the job clock starts here"""
+        self.started = self.clock()
+        self._text = self.render()
+        self._next_edit = self.clock() + self.interval
+        try:
+            self.status = await self.message.answer(self._text)
+        except TelegramAPIError as e:
+            logger.warning(f"Не удалось отправить сообщение о прогрессе: {e}")
+        return self
+
+    async def update(self, done: int, errors: int = 0, details: str = ""):
+        self.done, self.errors, self.details = done, errors, details
+        if self.clock() >= self._next_edit:
+            await self.flush()
+
+    async def flush(self):
+        """Edit the status message now if its text has changed"""
+        text = self.render()
+        if self.status is None or text == self._text:
+            return
+        self._next_edit = self.clock() + self.interval
+        try:
+            await self.status.edit_text(text)
+            self._text = text
+        except TelegramRetryAfter as e:
+            self._next_edit = self.clock() + e.retry_after
+        except TelegramAPIError as e:
+            logger.warning(f"Не удалось обновить сообщение о прогрессе: {e}")
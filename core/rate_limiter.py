@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import time
+
+from pyrogram import raw, utils
+from pyrogram.errors import FloodWait
+
+from config import TELEGRAM_RATE_LIMITS
+
+
+logger = logging.getLogger(__name__)
+
+# Сколько сообщений отдаёт Telegram за один запрос истории
+HISTORY_PAGE_SIZE = 100
+
+
+class TokenBucket:
+    """
+    Token bucket with an adaptive rate.
+
+    The rate grows slowly while requests succeed and is halved on every
+    FloodWait, so it settles near the highest rate Telegram accepts.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = rate / 16
+        self.max_rate = rate * 4
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._successes = 0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def on_success(self):
+        self._successes += 1
+        if self._successes >= self.capacity:
+            self._successes = 0
+            self.rate = min(self.max_rate, self.rate + self.min_rate)
+
+    def on_flood_wait(self, seconds: float):
+        now = time.monotonic()
+        self._successes = 0
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = 0.0
+        self.updated = now
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+    def blocked_for(self) -> float:
+        return max(0.0, self.blocked_until - time.monotonic())
+
+
+class RateLimiter:
+    """Set of token buckets, one per class of Telegram methods"""
+
+    def __init__(self, limits: dict = None):
+        limits = limits or TELEGRAM_RATE_LIMITS
+        self.buckets = {
+            method_class: TokenBucket(rate, capacity)
+            for method_class, (rate, capacity) in limits.items()
+        }
+
+    def bucket(self, method_class: str) -> TokenBucket:
+        return self.buckets.get(method_class) or self.buckets["default"]
+
+    async def acquire(self, method_class: str):
+        await self.bucket(method_class).acquire()
+
+    def on_success(self, method_class: str):
+        self.bucket(method_class).on_success()
+
+    def blocked_for(self) -> float:
+        """Seconds left until every method class is available again"""
+        return max(bucket.blocked_for() for bucket in self.buckets.values())
+
+    def on_flood_wait(self, method_class: str, seconds: float):
+        bucket = self.bucket(method_class)
+        bucket.on_flood_wait(seconds)
+        logger.warning(
+            f"FloodWait {seconds}s for '{method_class}', rate lowered to {bucket.rate:.3f} req/s"
+        )
+
+
+class RateLimitedClient:
+    """
+    Wrapper around the Pyrogram client that sends every API call through
+    the rate limiter and retries it after FloodWait.
+
+    A FloodWait longer than max_flood_wait is raised after it is recorded,
+    so the caller can move the work to another account.
+
+    Attributes that are not wrapped (start, stop, ...) go to the client as is.
+    """
+
+    def __init__(self, client, limiter: RateLimiter = None, max_flood_wait: float = None):
+        self.client = client
+        self.limiter = limiter or RateLimiter()
+        self.max_flood_wait = max_flood_wait
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    async def call(self, method_class: str, func, *args, **kwargs):
+        while True:
+            await self.limiter.acquire(method_class)
+            try:
+                result = await func(*args, **kwargs)
+            except FloodWait as e:
+                self.limiter.on_flood_wait(method_class, e.value)
+                if self.max_flood_wait is not None and e.value > self.max_flood_wait:
+                    raise
+                continue
+            self.limiter.on_success(method_class)
+            return result
+
+    def flood_wait_remaining(self) -> float:
+        return self.limiter.blocked_for()
+
+    async def get_chat(self, chat_id):
+        return await self.call("resolve", self.client.get_chat, chat_id)
+
+    async def _get_history_page(self, chat_id, limit: int, offset_id: int):
+        # Client.get_chat_history шлёт GetHistory с sleep_threshold=60 и сам спит
+        # на FloodWait до минуты, занимая слот и не давая лимитеру снизить скорость.
+        # Поэтому запрос отправляется напрямую, с sleep_threshold=0
+        history = await self.client.invoke(
+            raw.functions.messages.GetHistory(
+                peer=await self.client.resolve_peer(chat_id),
+                offset_id=offset_id,
+                offset_date=0,
+                add_offset=0,
+                limit=limit,
+                max_id=0,
+                min_id=0,
+                hash=0,
+            ),
+            sleep_threshold=0,
+        )
+        return await utils.parse_messages(self.client, history, replies=0)
+
+    async def get_chat_history(self, chat_id, limit: int = 0, offset_id: int = 0):
+        """
+        Same as Client.get_chat_history, but one page is one rate-limited
+        request, and a FloodWait resumes from the last page instead of
+        starting the history over.
+        """
+        fetched = 0
+        while not limit or fetched < limit:
+            page_size = min(HISTORY_PAGE_SIZE, limit - fetched) if limit else HISTORY_PAGE_SIZE
+            messages = await self.call(
+                "history", self._get_history_page, chat_id, page_size, offset_id
+            )
+            if not messages:
+                return
+            for message in messages:
+                yield message
+            fetched += len(messages)
+            offset_id = messages[-1].id
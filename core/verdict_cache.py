@@ -0,0 +1,91 @@
+import hashlib
+import logging
+import re
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from config import VERDICT_CACHE_SIZE, VERDICT_CACHE_TTL_DAYS
+from core.ai_filter import PROMPT_VERSION
+from database.db_commands import (
+    get_cached_verdict,
+    save_cached_verdict,
+    purge_cached_verdicts,
+)
+
+
+logger = logging.getLogger(__name__)
+
+URL_RE = re.compile(r"(https?://|www\.|t\.me/)\S+", re.IGNORECASE)
+
+
+def normalize_text(text: str | None) -> str:
+    """Text without links, case and extra whitespace"""
+    return " ".join(URL_RE.sub(" ", text or "").lower().split())
+
+
+def verdict_key(text: str | None) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class VerdictCache:
+    """
+    Verdicts of already classified texts: an in-memory LRU in front of
+    the cachedverdicts table.
+
+    Entries are bound to the prompt version, so changing the prompt
+    invalidates them, and expire after ttl_days.
+    """
+
+    def __init__(
+        self,
+        size: int = VERDICT_CACHE_SIZE,
+        ttl_days: int = VERDICT_CACHE_TTL_DAYS,
+        prompt_version: str = PROMPT_VERSION,
+    ):
+        self.size = size
+        self.ttl = timedelta(days=ttl_days)
+        self.prompt_version = prompt_version
+        self._memory = OrderedDict()
+
+    def _remember(self, key: str, is_scam: bool, created_at: datetime):
+        self._memory[key] = (is_scam, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.size:
+            self._memory.popitem(last=False)
+
+    async def get(self, text: str | None):
+        """
+        Returns:
+            bool | None: Cached verdict or None on a miss
+        """
+        key = verdict_key(text)
+        not_before = datetime.now() - self.ttl
+        if key in self._memory:
+            is_scam, created_at = self._memory[key]
+            if created_at >= not_before:
+                self._memory.move_to_end(key)
+                return is_scam
+            del self._memory[key]
+
+        cached = await get_cached_verdict(key, self.prompt_version, not_before)
+        if cached is None:
+            return None
+        self._remember(key, cached.is_scam, cached.created_at)
+        return cached.is_scam
+
+    async def put(self, text: str | None, is_scam: bool, raw_answer: str):
+        key = verdict_key(text)
+        self._remember(key, is_scam, datetime.now())
+        await save_cached_verdict(key, self.prompt_version, is_scam, raw_answer)
+
+    async def purge(self) -> int:
+        """Drop expired verdicts and verdicts of other prompt versions"""
+        self._memory.clear()
+        deleted = await purge_cached_verdicts(
+            self.prompt_version, datetime.now() - self.ttl
+        )
+        logger.info(f"Удалено {deleted} устаревших вердиктов из кэша")
+        return deleted
+
+
+verdict_cache = VerdictCache()
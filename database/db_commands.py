@@ -1,21 +1,37 @@
+import asyncio
 import logging
 import csv
 import re
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from typing import List
-from sqlalchemy import select, exists, update, and_, func
+from sqlalchemy import select, exists, update, delete, and_, or_, func
 from sqlalchemy.exc import SQLAlchemyError
-
-from database.database import get_db_session
-from database.models import Post, Channel, ChannelHistory, Blacklist
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database.database import get_db_session, engine
+from database.models import (
+    Post,
+    Channel,
+    ChannelHistory,
+    Blacklist,
+    ParsingState,
+    BackfillCheckpoint,
+    CachedVerdict,
+    PostCounter,
+    post_content_hash,
+)
 
 from constants.db_constants import DEFAULT_PATTERNS
 from constants.logger import LOG_DB
+from utils.minhash import NUM_BANDS, lsh_columns, word_set, jaccard
 
 
 logger = logging.getLogger(__name__)
 
+# Сколько строк выгрузка читает из базы и пишет в файл за раз
+EXPORT_BATCH_SIZE = 1000
+
 
 async def initialize_blacklist():
     async with get_db_session() as session:
@@ -44,113 +60,207 @@ async def initialize_blacklist():
 
 
 async def get_unchecked_posts_count():
+    return (await get_stats())["unchecked"]
+
+
+COUNTER_NAMES = ("total_posts", "recipes", "unchecked")
+
+
+async def _bump_counters(session, **deltas):
+    """Change post counters inside the caller's transaction"""
+    # Всегда в одном порядке, чтобы конкурентные транзакции не блокировали друг друга по кругу
+    for name, delta in sorted(deltas.items()):
+        if delta:
+            await session.execute(
+                update(PostCounter)
+                .where(PostCounter.name == name)
+                .values(value=PostCounter.value + delta)
+            )
+
+
+async def reconcile_post_counters():
+    """
+    Recount post counters exactly and overwrite the stored values.
+
+    Counter rows are locked first, so transactions that change posts wait
+    for the recount instead of having their increments overwritten.
+
+    Returns:
+        dict: Exact counters, see get_stats
+    """
     async with get_db_session() as session:
         try:
+            await session.execute(update(PostCounter).values(value=PostCounter.value))
+            result = await session.execute(select(PostCounter.name, PostCounter.value))
+            stored = dict(result.all())
+
             result = await session.execute(
-                select(func.count()).select_from(Post).where(Post.is_processed == False)
+                select(
+                    func.count(),
+                    func.count().filter(Post.is_recipe == True),
+                    func.count().filter(Post.is_processed == False),
+                ).select_from(Post)
             )
-            count = result.scalar()
-            return count or 0
+            exact = dict(zip(COUNTER_NAMES, result.one()))
+
+            now = datetime.now()
+            for name, value in exact.items():
+                if name in stored and stored[name] != value:
+                    logger.warning(f"Счётчик {name} разошёлся: {stored[name]} вместо {value}")
+                await session.execute(
+                    _insert(PostCounter)
+                    .values(name=name, value=value, reconciled_at=now)
+                    .on_conflict_do_update(
+                        index_elements=["name"], set_={"value": value, "reconciled_at": now}
+                    )
+                )
+            await session.commit()
+            return exact
         except SQLAlchemyError as e:
-            logging.error(e)
-            return 0  # Return 0 instead of False for consistency
+            logger.error(LOG_DB["db_err"].format(error=e))
+            return {name: 0 for name in COUNTER_NAMES}
 
 
-async def   export_data_to_csv():
-    try:
-        filename = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        async with get_db_session() as session:
-            headers = [col.name for col in Post.__table__.columns]
-
-            result = await session.execute(select(Post))
-            posts = result.scalars().all()
-        with open(filename, mode="w", newline="", encoding="utf-8-sig") as file:
-            writer = csv.writer(file, delimiter=";", quoting=csv.QUOTE_MINIMAL)
-
-            writer.writerow(headers)
-
-            for post in posts:
-                row = [getattr(post, col.name) for col in Post.__table__.columns]
-                cleaned_row = [
-                    (
-                        str(item).replace(";", ",").strip()
-                        if isinstance(item, str)
-                        else item
-                    )
+class _CsvExport:
+    def __init__(self, filename, headers):
+        self.file = open(filename, mode="w", newline="", encoding="utf-8-sig")
+        self.writer = csv.writer(self.file, delimiter=";", quoting=csv.QUOTE_MINIMAL)
+        self.writer.writerow(headers)
+
+    def write_rows(self, rows):
+        self.writer.writerows(
+            [
+                str(item).replace(";", ",").strip() if isinstance(item, str) else item
+                for item in row
+            ]
+            for row in rows
+        )
+
+    def close(self):
+        self.file.close()
+
+
+class _ExcelExport:
+    def __init__(self, filename, headers):
+        from openpyxl import Workbook
+
+        self.filename = filename
+        # write-only книга сразу сбрасывает строки во временный файл
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet("Posts")
+        self.sheet.append(headers)
+
+    def write_rows(self, rows):
+        from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+        for row in rows:
+            self.sheet.append(
+                [
+                    ILLEGAL_CHARACTERS_RE.sub("", item).strip() if isinstance(item, str) else item
                     for item in row
                 ]
-                writer.writerow(cleaned_row)
-            logger.info(LOG_DB["export_csv"])
-        return filename
-    except Exception as e:
-        logging.error(LOG_DB["db_err"].format(error=e))
-        return False
+            )
 
+    def close(self):
+        self.workbook.save(self.filename)
 
-async def export_data_to_excel():
+
+async def _export_posts(export_class, extension, on_progress=None):
+    """
+    Stream all posts into a file with constant memory.
+
+    Rows are fetched in EXPORT_BATCH_SIZE batches (a server-side cursor on
+    PostgreSQL) and written in a worker thread, so the event loop is never
+    blocked; the next batch is fetched while the previous one is written.
+
+    Returns:
+        str | bool: File name or False on error
+    """
+    filename = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    columns = list(Post.__table__.columns)
     try:
-        from openpyxl import Workbook
-        from datetime import datetime
-        
-        filename = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        
-        async with get_db_session() as session:
-            headers = [col.name for col in Post.__table__.columns]
-            
-            result = await session.execute(select(Post))
-            posts = result.scalars().all()
-        
-        # Создаем новую книгу Excel
-        workbook = Workbook()
-        sheet = workbook.active
-        sheet.title = "Posts"
-        
-        # Записываем заголовки
-        for col_idx, header in enumerate(headers, 1):
-            sheet.cell(row=1, column=col_idx).value = header
-        
-        # Записываем данные
-        for row_idx, post in enumerate(posts, 2):
-            for col_idx, col in enumerate(Post.__table__.columns, 1):
-                value = getattr(post, col.name)
-                # Преобразуем значение в строку, если это необходимо
-                if isinstance(value, str):
-                    value = value.strip()
-                sheet.cell(row=row_idx, column=col_idx).value = value
-        
-        # Сохраняем файл
-        workbook.save(filename)
+        export = await asyncio.to_thread(export_class, filename, [col.name for col in columns])
+        writing = None
+        try:
+            async with get_db_session() as session:
+                result = await session.stream(
+                    select(*columns)
+                    .order_by(Post.id)
+                    .execution_options(yield_per=EXPORT_BATCH_SIZE)
+                )
+                written = 0
+                async for rows in result.partitions():
+                    if writing is not None:
+                        await writing
+                    writing = asyncio.ensure_future(asyncio.to_thread(export.write_rows, rows))
+                    written += len(rows)
+                    if on_progress:
+                        await on_progress(written)
+                if writing is not None:
+                    await writing
+        finally:
+            # Файл закрывается только после того, как поток дописал последнюю пачку
+            if writing is not None:
+                await asyncio.wait([writing])
+            await asyncio.to_thread(export.close)
         logger.info(LOG_DB["export_csv"])
         return filename
-    
     except Exception as e:
         logging.error(LOG_DB["db_err"].format(error=e))
         return False
 
+
+async def export_data_to_csv(on_progress=None):
+    """
+    Export all posts to a ;-separated .csv file.
+
+    on_progress is an async callable that gets the number of exported rows
+    after every batch.
+    """
+    return await _export_posts(_CsvExport, "csv", on_progress)
+
+
+async def export_data_to_excel(on_progress=None):
+    """
+    Export all posts to an .xlsx file.
+
+    on_progress is an async callable that gets the number of exported rows
+    after every batch.
+    """
+    return await _export_posts(_ExcelExport, "xlsx", on_progress)
+
+
 async def save_post(
     check_date, post_date, channel_link, post_link, post_text, user_requested=0
 ):
     async with get_db_session() as session:
         try:
+            content_hash = post_content_hash(post_text)
             post = Post(
                 check_date=check_date,
                 post_date=post_date,
                 channel_link=channel_link,
                 post_link=post_link,
                 post_text=post_text,
+                content_hash=content_hash,
                 user_requested=user_requested,
+                **lsh_columns(post_text),
             )
 
             result = await session.execute(
                 select(
                     exists().where(
-                        and_(Post.post_text == post_text, Post.post_link == post_link)
+                        and_(
+                            Post.post_link == post_link,
+                            Post.content_hash == content_hash,
+                        )
                     )
                 )
             )
             post_db = result.scalar()
             if not post_db:
                 session.add(post)
+                await _bump_counters(session, total_posts=1, unchecked=1)
                 await session.commit()
                 await session.refresh(post)
                 return True
@@ -160,6 +270,90 @@ async def save_post(
             return False
 
 
+def _insert(table):
+    """INSERT with ON CONFLICT support for the current database dialect"""
+    if engine.dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+async def insert_new_posts(
+    posts: List[dict], claimed_by=None, lease_seconds=0, raise_errors=False
+):
+    """
+    Save a batch of posts in one transaction.
+
+    Every post is a dict with save_post arguments. Duplicates by post_link +
+    content hash are skipped, both inside the batch and against the table.
+    With claimed_by the posts are inserted already leased to that worker
+    for lease_seconds, so other checkers do not take them. With raise_errors
+    a DB error is raised after logging instead of looking like a batch of
+    duplicates.
+
+    Returns:
+        list: (id, post_text) rows of the posts actually inserted
+    """
+    if not posts:
+        return []
+
+    lease_expires_at = (
+        datetime.now() + timedelta(seconds=lease_seconds) if claimed_by else None
+    )
+    rows = {}
+    for post in posts:
+        content_hash = post_content_hash(post.get("post_text"))
+        key = (post["post_link"], content_hash)
+        if key not in rows:
+            rows[key] = {
+                "check_date": post.get("check_date") or datetime.now(),
+                "post_date": post.get("post_date"),
+                "channel_link": post["channel_link"],
+                "post_link": post["post_link"],
+                "post_text": post.get("post_text"),
+                "content_hash": content_hash,
+                "user_requested": post.get("user_requested", 0),
+                "is_recipe": False,
+                "is_processed": False,
+                "claimed_by": claimed_by,
+                "lease_expires_at": lease_expires_at,
+                **lsh_columns(post.get("post_text")),
+            }
+
+    async with get_db_session() as session:
+        try:
+            result = await session.execute(
+                _insert(Post)
+                .values(list(rows.values()))
+                .on_conflict_do_nothing(index_elements=["post_link", "content_hash"])
+                .returning(Post.id, Post.post_text)
+            )
+            inserted = result.all()
+            await _bump_counters(session, total_posts=len(inserted), unchecked=len(inserted))
+            await session.commit()
+            return inserted
+        except SQLAlchemyError as e:
+            logger.error(LOG_DB["db_err"].format(error=e))
+            if raise_errors:
+                raise
+            return []
+
+
+async def save_posts_many(posts: List[dict]) -> int:
+    """
+    Bulk version of save_post.
+
+    Unlike save_post a DB error is raised, so the parser does not move the
+    channel mark or backfill checkpoint past a batch that was not saved.
+
+    Returns:
+        int: Number of posts actually inserted
+
+    Raises:
+        SQLAlchemyError: If the batch could not be saved
+    """
+    return len(await insert_new_posts(posts, raise_errors=True))
+
+
 async def add_channel(channel_link, source="parser"):
     # Normalize channel link
     if "@" in channel_link:
@@ -251,11 +445,32 @@ async def save_new_channels(channels: List[str], source: str = "auto_find") -> i
             return 0  # Return 0 instead of False for consistency
 
 
-async def mark_post_as_checked(post_id, is_recipe):
+async def mark_post_as_checked(post_id, is_recipe, verdict_source=None, explanation=None):
     async with get_db_session() as session:
         try:
-            stmt = update(Post).where(Post.id == post_id).values(is_processed=True, is_recipe=is_recipe)
+            # Прежний вердикт нужен, чтобы поправить счётчики на разницу
+            result = await session.execute(
+                select(Post.is_processed, Post.is_recipe)
+                .where(Post.id == post_id)
+                .with_for_update()
+            )
+            previous = result.one_or_none()
+            if previous is None:
+                return False
+            stmt = update(Post).where(Post.id == post_id).values(
+                is_processed=True,
+                is_recipe=is_recipe,
+                verdict_source=verdict_source,
+                verdict_explanation=explanation,
+                claimed_by=None,
+                lease_expires_at=None,
+            )
             await session.execute(stmt)
+            await _bump_counters(
+                session,
+                unchecked=-int(not previous.is_processed),
+                recipes=int(bool(is_recipe)) - int(bool(previous.is_recipe)),
+            )
             await session.commit()
             return True
         except SQLAlchemyError as e:
@@ -263,10 +478,153 @@ async def mark_post_as_checked(post_id, is_recipe):
             return False
 
 
-async def get_unchecked_posts(limit=None):
+def _llm_backed_verdict():
+    """
+    Filter for verdicts that go back to GigaChat: the prefilter and the
+    local model decide only clear-cut posts, their verdicts must not spread
+    to other posts.
+    """
+    return or_(
+        Post.verdict_source.is_(None),
+        and_(
+            Post.verdict_source.not_like("prefilter:%"),
+            Post.verdict_source != "local_model",
+        ),
+    )
+
+
+async def find_near_duplicate_verdict(
+    post_text: str, bands: list, exclude_id=None, min_similarity=0.8
+):
+    """
+    Find the most similar already checked post.
+
+    Candidates share at least one MinHash LSH band with the text, then the
+    exact Jaccard similarity of their word sets is checked. Only verdicts
+    backed by GigaChat are inherited, so a post the prefilter sends to the
+    LLM does not get a prefilter verdict of its twin.
+
+    Returns:
+        tuple: (post_id, is_recipe) of the nearest twin or None
+    """
+    band_columns = [getattr(Post, f"lsh_band{i}") for i in range(NUM_BANDS)]
+    async with get_db_session() as session:
+        try:
+            query = (
+                select(Post.id, Post.post_text, Post.is_recipe)
+                .where(
+                    Post.is_processed == True,
+                    _llm_backed_verdict(),
+                    or_(*(column == band for column, band in zip(band_columns, bands))),
+                )
+                .limit(50)
+            )
+            if exclude_id is not None:
+                query = query.where(Post.id != exclude_id)
+            result = await session.execute(query)
+            words = word_set(post_text)
+            best = None
+            for post_id, candidate_text, is_recipe in result.all():
+                similarity = jaccard(words, word_set(candidate_text))
+                if similarity >= min_similarity and (best is None or similarity > best[0]):
+                    best = (similarity, post_id, is_recipe)
+            return (best[1], best[2]) if best else None
+        except SQLAlchemyError as e:
+            logger.error(LOG_DB["db_err"].format(error=e))
+            return None
+
+
+async def get_cached_verdict(text_hash: str, prompt_version: str, not_before: datetime):
+    async with get_db_session() as session:
+        try:
+            result = await session.execute(
+                select(CachedVerdict).where(
+                    CachedVerdict.text_hash == text_hash,
+                    CachedVerdict.prompt_version == prompt_version,
+                    CachedVerdict.created_at >= not_before,
+                )
+            )
+            return result.scalar_one_or_none()
+        except SQLAlchemyError as e:
+            logger.error(LOG_DB["db_err"].format(error=e))
+            return None
+
+
+async def save_cached_verdict(
+    text_hash: str, prompt_version: str, is_scam: bool, raw_answer: str
+) -> bool:
+    values = dict(
+        text_hash=text_hash,
+        prompt_version=prompt_version,
+        is_scam=is_scam,
+        raw_answer=raw_answer,
+        created_at=datetime.now(),
+    )
+    async with get_db_session() as session:
+        try:
+            await session.execute(
+                _insert(CachedVerdict)
+                .values(**values)
+                .on_conflict_do_update(
+                    index_elements=["text_hash", "prompt_version"],
+                    set_={k: values[k] for k in ("is_scam", "raw_answer", "created_at")},
+                )
+            )
+            await session.commit()
+            return True
+        except SQLAlchemyError as e:
+            logger.error(LOG_DB["db_err"].format(error=e))
+            return False
+
+
+async def purge_cached_verdicts(prompt_version: str, not_before: datetime) -> int:
+    """Delete verdicts of other prompt versions and verdicts older than not_before"""
+    async with get_db_session() as session:
+        try:
+            result = await session.execute(
+                delete(CachedVerdict).where(
+                    or_(
+                        CachedVerdict.prompt_version != prompt_version,
+                        CachedVerdict.created_at < not_before,
+                    )
+                )
+            )
+            await session.commit()
+            return result.rowcount
+        except SQLAlchemyError as e:
+            logger.error(LOG_DB["db_err"].format(error=e))
+            return 0
+
+
+async def get_labeled_posts():
+    """
+    Texts and verdicts of checked posts for training the local classifier.
+
+    Verdicts of the prefilter and of the local model itself are skipped,
+    so the model learns only from LLM labels.
+    """
+    async with get_db_session() as session:
+        try:
+            result = await session.execute(
+                select(Post.post_text, Post.is_recipe).where(
+                    Post.is_processed == True,
+                    Post.post_text.is_not(None),
+                    _llm_backed_verdict(),
+                )
+            )
+            return result.all()
+        except SQLAlchemyError as e:
+            logger.error(LOG_DB["db_err"].format(error=e))
+            return []
+
+
+async def get_unchecked_posts(limit=None, after_id=None):
     async with get_db_session() as session:
         try:
             query = select(Post.id, Post.post_text).where(Post.is_processed == False)
+            if after_id is not None:
+                # Постраничный обход по id, чтобы не брать одни и те же посты заново
+                query = query.where(Post.id > after_id).order_by(Post.id)
             if limit:
                 query = query.limit(limit)
             result = await session.execute(query)
@@ -277,6 +635,193 @@ async def get_unchecked_posts(limit=None):
             return []  # Return empty list instead of False for consistency
 
 
+async def claim_unchecked_posts(worker_id: str, limit: int, lease_seconds: float):
+    """
+    Atomically lease a page of unchecked posts to a worker.
+
+    Posts without a lease or with an expired one are taken in id order.
+    On PostgreSQL the candidates are locked with FOR UPDATE SKIP LOCKED, so
+    concurrent workers get disjoint pages without waiting for each other;
+    SQLite runs the single UPDATE ... RETURNING under its write lock.
+
+    Returns:
+        list: (id, post_text) rows of the claimed posts
+    """
+    now = datetime.now()
+    candidates = (
+        select(Post.id)
+        .where(
+            Post.is_processed == False,
+            or_(Post.lease_expires_at.is_(None), Post.lease_expires_at < now),
+        )
+        .order_by(Post.id)
+        .limit(limit)
+    )
+    if engine.dialect.name == "postgresql":
+        candidates = candidates.with_for_update(skip_locked=True)
+
+    async with get_db_session() as session:
+        try:
+            result = await session.execute(
+                update(Post)
+                .where(Post.id.in_(candidates.scalar_subquery()))
+                .values(
+                    claimed_by=worker_id,
+                    lease_expires_at=now + timedelta(seconds=lease_seconds),
+                    # аренда - не проверка, дату проверки не трогаем
+                    check_date=Post.check_date,
+                )
+                .returning(Post.id, Post.post_text)
+                .execution_options(synchronize_session=False)
+            )
+            posts = sorted(result.all())
+            await session.commit()
+            return posts
+        except SQLAlchemyError as e:
+            logger.error(LOG_DB["db_err"].format(error=e))
+            return []
+
+
+async def release_posts(worker_id: str) -> int:
+    """Drop the leases a worker still holds on unchecked posts"""
+    async with get_db_session() as session:
+        try:
+            result = await session.execute(
+                update(Post)
+                .where(Post.claimed_by == worker_id, Post.is_processed == False)
+                .values(claimed_by=None, lease_expires_at=None, check_date=Post.check_date)
+            )
+            await session.commit()
+            return result.rowcount
+        except SQLAlchemyError as e:
+            logger.error(LOG_DB["db_err"].format(error=e))
+            return 0
+
+
+async def get_last_post_id(channel_link: str):
+    async with get_db_session() as session:
+        try:
+            result = await session.execute(
+                select(ParsingState.last_post_id).where(
+                    ParsingState.channel_link == channel_link
+                )
+            )
+            return result.scalar_one_or_none()
+        except SQLAlchemyError as e:
+            logger.error(LOG_DB["db_err"].format(error=e))
+            return None
+
+
+async def update_last_post_id(channel_link: str, last_post_id: int) -> bool:
+    async with get_db_session() as session:
+        try:
+            result = await session.execute(
+                select(ParsingState).where(ParsingState.channel_link == channel_link)
+            )
+            state = result.scalar_one_or_none()
+            if not state:
+                session.add(
+                    ParsingState(channel_link=channel_link, last_post_id=last_post_id)
+                )
+            else:
+                state.last_post_id = max(state.last_post_id, last_post_id)
+                state.last_parsed = datetime.now()
+            await session.commit()
+            return True
+        except SQLAlchemyError as e:
+            logger.error(LOG_DB["db_err"].format(error=e))
+            return False
+
+
+async def get_backfill_checkpoint(channel_link: str):
+    async with get_db_session() as session:
+        try:
+            result = await session.execute(
+                select(BackfillCheckpoint).where(
+                    BackfillCheckpoint.channel_link == channel_link
+                )
+            )
+            return result.scalar_one_or_none()
+        except SQLAlchemyError as e:
+            logger.error(LOG_DB["db_err"].format(error=e))
+            return None
+
+
+async def save_backfill_checkpoint(channel_link: str, **values) -> bool:
+    """Create or update the backfill checkpoint of a channel with given values"""
+    async with get_db_session() as session:
+        try:
+            result = await session.execute(
+                select(BackfillCheckpoint).where(
+                    BackfillCheckpoint.channel_link == channel_link
+                )
+            )
+            checkpoint = result.scalar_one_or_none()
+            if not checkpoint:
+                checkpoint = BackfillCheckpoint(channel_link=channel_link)
+                session.add(checkpoint)
+            for key, value in values.items():
+                setattr(checkpoint, key, value)
+            await session.commit()
+            return True
+        except SQLAlchemyError as e:
+            logger.error(LOG_DB["db_err"].format(error=e))
+            return False
+
+
+async def get_unfinished_backfills():
+    async with get_db_session() as session:
+        try:
+            result = await session.execute(
+                select(BackfillCheckpoint)
+                .where(BackfillCheckpoint.status != "done")
+                .order_by(BackfillCheckpoint.updated_at.desc())
+            )
+            return result.scalars().all()
+        except SQLAlchemyError as e:
+            logger.error(LOG_DB["db_err"].format(error=e))
+            return []
+
+
+async def get_resolved_chat(channel_link: str):
+    async with get_db_session() as session:
+        try:
+            result = await session.execute(
+                select(Channel).where(
+                    Channel.channel_link == channel_link,
+                    Channel.chat_id.is_not(None),
+                )
+            )
+            return result.scalar_one_or_none()
+        except SQLAlchemyError as e:
+            logger.error(LOG_DB["db_err"].format(error=e))
+            return None
+
+
+async def save_resolved_chat(
+    channel_link: str, chat_id, access_hash, title: str, resolved_by: str
+) -> bool:
+    """Store the resolved chat on the channel row (None values clear the cache)"""
+    async with get_db_session() as session:
+        try:
+            await session.execute(
+                update(Channel)
+                .where(Channel.channel_link == channel_link)
+                .values(
+                    chat_id=chat_id,
+                    access_hash=access_hash,
+                    title=title,
+                    resolved_by=resolved_by,
+                    resolved_at=datetime.now() if chat_id is not None else None,
+                )
+            )
+            await session.commit()
+            return True
+        except SQLAlchemyError as e:
+            logger.error(LOG_DB["db_err"].format(error=e))
+            return False
+
+
 async def get_active_channels():
     async with get_db_session() as session:
         try:
@@ -311,30 +856,17 @@ async def deactivate_channel(channel_link: str, error_message: str = ""):
 
 
 async def get_stats():
+    """Post counters from the postcounters table, recounted if they are missing"""
     async with get_db_session() as session:
         try:
-            result = await session.execute(select(func.count()).select_from(Post))
-            all_posts = result.scalar() or 0
-
-            result = await session.execute(
-                select(func.count()).select_from(Post).where(Post.is_recipe == True)
-            )
-            recipe_posts = result.scalar() or 0
-
-            result = await session.execute(
-                select(func.count()).select_from(Post).where(Post.is_processed == False)
-            )
-            unck_posts = result.scalar() or 0
-
-            final_dict = {
-                "total_posts": all_posts,
-                "recipes": recipe_posts,
-                "unchecked": unck_posts,
-            }
-            return final_dict
+            result = await session.execute(select(PostCounter.name, PostCounter.value))
+            counters = dict(result.all())
         except SQLAlchemyError as e:
             logger.error(LOG_DB["db_err"].format(error=e))
             return {"total_posts": 0, "recipes": 0, "unchecked": 0}  # Return default dict instead of False
+    if any(name not in counters for name in COUNTER_NAMES):
+        return await reconcile_post_counters()
+    return {name: counters[name] for name in COUNTER_NAMES}
 
 
 async def get_posts_for_search():
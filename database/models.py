@@ -1,6 +1,7 @@
+import hashlib
 from datetime import datetime
 
-from sqlalchemy import Integer, String, DateTime
+from sqlalchemy import Integer, BigInteger, String, DateTime, Index, UniqueConstraint
 from sqlalchemy.orm import DeclarativeBase, declared_attr, Mapped, mapped_column
 
 from sqlalchemy.ext.asyncio import AsyncAttrs
@@ -16,7 +17,21 @@ class Base(DeclarativeBase, AsyncAttrs):
         return self.__name__.lower() + "s"
 
 
+def post_content_hash(post_text: str | None) -> str:
+    """sha256 of the post text, used together with post_link for deduplication"""
+    return hashlib.sha256((post_text or "").encode("utf-8")).hexdigest()
+
+
+def _content_hash_default(context):
+    return post_content_hash(context.get_current_parameters().get("post_text"))
+
+
 class Post(Base):
+    __table_args__ = (
+        Index("ix_posts_post_link_content_hash", "post_link", "content_hash", unique=True),
+        Index("ix_posts_channel_link_post_date", "channel_link", "post_date"),
+    )
+
     check_date: Mapped[datetime] = mapped_column(
         DateTime,
         default=datetime.now,
@@ -26,9 +41,45 @@ class Post(Base):
     channel_link: Mapped[str] = mapped_column(String)
     post_link: Mapped[str] = mapped_column(String)
     post_text: Mapped[str | None] = mapped_column(String)
+    content_hash: Mapped[str] = mapped_column(String(64), default=_content_hash_default)
     user_requested: Mapped[int | None] = mapped_column(Integer, default=0)
     is_recipe: Mapped[bool] = mapped_column(default=False)
     is_processed: Mapped[bool] = mapped_column(default=False)
+    # Кто вынес вердикт: llm, cache, local_model, prefilter:<правило>,
+    # near_duplicate:<id поста-двойника>
+    verdict_source: Mapped[str | None] = mapped_column(String, nullable=True)
+    # Объяснение GigaChat для мошеннических постов (если включён второй проход)
+    verdict_explanation: Mapped[str | None] = mapped_column(String, nullable=True)
+    # MinHash LSH-полосы текста для поиска почти-дубликатов
+    lsh_band0: Mapped[int | None] = mapped_column(BigInteger, nullable=True, index=True)
+    lsh_band1: Mapped[int | None] = mapped_column(BigInteger, nullable=True, index=True)
+    lsh_band2: Mapped[int | None] = mapped_column(BigInteger, nullable=True, index=True)
+    lsh_band3: Mapped[int | None] = mapped_column(BigInteger, nullable=True, index=True)
+    lsh_band4: Mapped[int | None] = mapped_column(BigInteger, nullable=True, index=True)
+    lsh_band5: Mapped[int | None] = mapped_column(BigInteger, nullable=True, index=True)
+    lsh_band6: Mapped[int | None] = mapped_column(BigInteger, nullable=True, index=True)
+    lsh_band7: Mapped[int | None] = mapped_column(BigInteger, nullable=True, index=True)
+    # Аренда поста проверяющим воркером: кто взял и до какого времени.
+    # После истечения аренды пост может забрать другой воркер
+    claimed_by: Mapped[str | None] = mapped_column(String, nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+
+# Частичные индексы горячих фильтров: в них попадают только непроверенные
+# и только мошеннические посты, поэтому они маленькие и подсчёт по ним не
+# читает таблицу. Условие должно совпадать с условием запросов.
+Index(
+    "ix_posts_unprocessed",
+    Post.id,
+    postgresql_where=Post.is_processed == False,
+    sqlite_where=Post.is_processed == False,
+)
+Index(
+    "ix_posts_recipe",
+    Post.id,
+    postgresql_where=Post.is_recipe == True,
+    sqlite_where=Post.is_recipe == True,
+)
 
 
 class Channel(Base):
@@ -36,8 +87,14 @@ class Channel(Base):
     added_date: Mapped[str] = mapped_column(
         DateTime, default=datetime.now, onupdate=datetime.now
     )
-    is_active: Mapped[bool] = mapped_column(default=True)
+    is_active: Mapped[bool] = mapped_column(default=True, index=True)
     source: Mapped[str] = mapped_column(String)
+    # Кэш резолва канала. access_hash действителен только для аккаунта resolved_by
+    chat_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    access_hash: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    title: Mapped[str | None] = mapped_column(String, nullable=True)
+    resolved_by: Mapped[str | None] = mapped_column(String, nullable=True)
+    resolved_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
 
 class Blacklist(Base):
@@ -55,3 +112,43 @@ class ChannelHistory(Base):
         DateTime, default=datetime.now, onupdate=datetime.now
     )
     error_message: Mapped[str] = mapped_column(String, nullable=True)
+
+
+class ParsingState(Base):
+    channel_link: Mapped[str] = mapped_column(String, unique=True)
+    last_post_id: Mapped[int] = mapped_column(Integer)
+    last_parsed: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.now, onupdate=datetime.now
+    )
+
+
+class BackfillCheckpoint(Base):
+    channel_link: Mapped[str] = mapped_column(String, unique=True)
+    # Самый новый пост на момент старта и id, с которого продолжать (0 - с начала)
+    start_post_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    offset_id: Mapped[int] = mapped_column(Integer, default=0)
+    fetched_count: Mapped[int] = mapped_column(Integer, default=0)
+    saved_count: Mapped[int] = mapped_column(Integer, default=0)
+    status: Mapped[str] = mapped_column(String, default="running")
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.now, onupdate=datetime.now
+    )
+
+
+class CachedVerdict(Base):
+    __table_args__ = (UniqueConstraint("text_hash", "prompt_version"),)
+
+    # sha256 нормализованного текста (без ссылок, регистра и лишних пробелов)
+    text_hash: Mapped[str] = mapped_column(String(64))
+    prompt_version: Mapped[str] = mapped_column(String(16))
+    is_scam: Mapped[bool] = mapped_column()
+    raw_answer: Mapped[str | None] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+
+class PostCounter(Base):
+    # Счётчики для статистики: total_posts, recipes, unchecked. Меняются в тех же
+    # транзакциях, что и посты, и периодически пересчитываются заново
+    name: Mapped[str] = mapped_column(String, unique=True)
+    value: Mapped[int] = mapped_column(BigInteger, default=0)
+    reconciled_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
@@ -4,8 +4,12 @@ from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
 
 from core.bot_controller import setup_bot_handlers
-from config import TELEGRAM_BOT_TOKEN
-from core.client import telegram_client
+from config import TELEGRAM_BOT_TOKEN, STATS_RECONCILE_INTERVAL
+from core.client import client_pool
+from core.ai_filter import gigachat_client
+from core.verdict_cache import verdict_cache
+from core.local_classifier import local_classifier
+from database.db_commands import reconcile_post_counters
 
 from utils.logger import setup_logger
 
@@ -13,13 +17,28 @@ from utils.logger import setup_logger
 logger = setup_logger()
 logging.getLogger("pyrogram").setLevel(logging.WARNING)
 
+background_tasks = set()
+
+
+async def reconcile_counters_periodically():
+    while True:
+        await reconcile_post_counters()
+        await asyncio.sleep(STATS_RECONCILE_INTERVAL)
+
 
 async def on_start_up():
-    await telegram_client.start()
+    await client_pool.start()
+    await gigachat_client.open()
+    await verdict_cache.purge()
+    local_classifier.load()
+    background_tasks.add(asyncio.create_task(reconcile_counters_periodically()))
 
 
 async def on_shutdown():
-    await telegram_client.stop()
+    for task in background_tasks:
+        task.cancel()
+    await client_pool.stop()
+    await gigachat_client.close()
 
 
 async def main():
@@ -0,0 +1,52 @@
+"""hot path indexes
+
+Revision ID: 475abca67b6e
+Revises: 7a42c8e50501
+Create Date: 2026-10-17 23:00:26.782357
+
+"""
+from contextlib import nullcontext
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '475abca67b6e'
+down_revision: Union[str, None] = '7a42c8e50501'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _index_block():
+    # На PostgreSQL индексы строятся CONCURRENTLY, без блокировки записи в posts;
+    # это нельзя делать внутри транзакции миграции
+    if op.get_context().dialect.name == 'postgresql':
+        return op.get_context().autocommit_block()
+    return nullcontext()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with _index_block():
+        op.create_index(op.f('ix_channels_is_active'), 'channels', ['is_active'], unique=False,
+                        postgresql_concurrently=True)
+        op.create_index('ix_posts_channel_link_post_date', 'posts', ['channel_link', 'post_date'],
+                        unique=False, postgresql_concurrently=True)
+        op.create_index('ix_posts_recipe', 'posts', ['id'], unique=False,
+                        postgresql_where=sa.text('is_recipe = true'),
+                        sqlite_where=sa.text('is_recipe = 1'),
+                        postgresql_concurrently=True)
+        op.create_index('ix_posts_unprocessed', 'posts', ['id'], unique=False,
+                        postgresql_where=sa.text('is_processed = false'),
+                        sqlite_where=sa.text('is_processed = 0'),
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_posts_unprocessed', table_name='posts')
+    op.drop_index('ix_posts_recipe', table_name='posts')
+    op.drop_index('ix_posts_channel_link_post_date', table_name='posts')
+    op.drop_index(op.f('ix_channels_is_active'), table_name='channels')
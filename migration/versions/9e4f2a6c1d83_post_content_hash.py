@@ -0,0 +1,79 @@
+"""post content hash
+
+Revision ID: 9e4f2a6c1d83
+Revises: 5b1d0c7e9a42
+Create Date: 2026-10-17 12:40:05.377914
+
+"""
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4f2a6c1d83'
+down_revision: Union[str, None] = '5b1d0c7e9a42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+posts = sa.table(
+    'posts',
+    sa.column('id', sa.Integer),
+    sa.column('post_text', sa.String),
+    sa.column('content_hash', sa.String),
+)
+
+
+def backfill_content_hash() -> None:
+    """Fill content_hash for existing posts in batches by id"""
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(posts.c.id, posts.c.post_text)
+            .where(posts.c.id > last_id)
+            .order_by(posts.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        conn.execute(
+            posts.update()
+            .where(posts.c.id == sa.bindparam('post_id'))
+            .values(content_hash=sa.bindparam('hash')),
+            [
+                {
+                    'post_id': post_id,
+                    'hash': hashlib.sha256((post_text or '').encode('utf-8')).hexdigest(),
+                }
+                for post_id, post_text in rows
+            ],
+        )
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('posts', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    backfill_content_hash()
+    # Уже сохранённые дубли мешают уникальному индексу, оставляем самый ранний пост
+    op.execute(
+        'DELETE FROM posts WHERE id NOT IN '
+        '(SELECT MIN(id) FROM posts GROUP BY post_link, content_hash)'
+    )
+    with op.batch_alter_table('posts') as batch_op:
+        batch_op.alter_column('content_hash', existing_type=sa.String(length=64), nullable=False)
+    op.create_index(
+        'ix_posts_post_link_content_hash', 'posts', ['post_link', 'content_hash'], unique=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_posts_post_link_content_hash', table_name='posts')
+    with op.batch_alter_table('posts') as batch_op:
+        batch_op.drop_column('content_hash')
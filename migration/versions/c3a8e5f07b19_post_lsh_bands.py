@@ -0,0 +1,78 @@
+"""post lsh bands and verdict source
+
+Revision ID: c3a8e5f07b19
+Revises: 9e4f2a6c1d83
+Create Date: 2026-10-17 14:05:48.902311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from utils.minhash import NUM_BANDS, lsh_columns
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a8e5f07b19'
+down_revision: Union[str, None] = '9e4f2a6c1d83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 5000
+BAND_COLUMNS = [f'lsh_band{i}' for i in range(NUM_BANDS)]
+
+posts = sa.table(
+    'posts',
+    sa.column('id', sa.Integer),
+    sa.column('post_text', sa.String),
+    *(sa.column(name, sa.BigInteger) for name in BAND_COLUMNS),
+)
+
+
+def backfill_lsh_bands() -> None:
+    """Fill LSH band columns for existing posts in batches by id"""
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(posts.c.id, posts.c.post_text)
+            .where(posts.c.id > last_id)
+            .order_by(posts.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        values = [
+            {'post_id': post_id, **lsh_columns(post_text)}
+            for post_id, post_text in rows
+        ]
+        values = [value for value in values if value['lsh_band0'] is not None]
+        if values:
+            conn.execute(
+                posts.update()
+                .where(posts.c.id == sa.bindparam('post_id'))
+                .values(**{name: sa.bindparam(name) for name in BAND_COLUMNS}),
+                values,
+            )
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('posts', sa.Column('verdict_source', sa.String(), nullable=True))
+    for name in BAND_COLUMNS:
+        op.add_column('posts', sa.Column(name, sa.BigInteger(), nullable=True))
+    backfill_lsh_bands()
+    for name in BAND_COLUMNS:
+        op.create_index(op.f(f'ix_posts_{name}'), 'posts', [name], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in BAND_COLUMNS:
+        op.drop_index(op.f(f'ix_posts_{name}'), table_name='posts')
+    with op.batch_alter_table('posts') as batch_op:
+        for name in BAND_COLUMNS:
+            batch_op.drop_column(name)
+        batch_op.drop_column('verdict_source')
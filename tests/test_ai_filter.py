@@ -1,6 +1,9 @@
+import asyncio
+import time
 import pytest
 import uuid
-from core.ai_filter import  check_post, analyze_post_with_gigachat, get_gigachat_token, generate_rquid
+from core.ai_filter import  check_post, analyze_post_with_gigachat, get_gigachat_token, generate_rquid, GigaChatClient, TokenManager, PostBatcher, parse_batch_answer, parse_verdict, CircuitBreaker
+import core.ai_filter as ai_filter
 
 test_data = [
     (
@@ -44,4 +47,242 @@ async def test_token_retrive():
 async def test_uUid_generation():
     _uuid = uuid.UUID(generate_rquid())
     assert isinstance(_uuid, uuid.UUID)
-    assert _uuid.version == 4
\ No newline at end of file
+    assert _uuid.version == 4
+
+@pytest.mark.asyncio
+async def test_gigachat_client_reuses_session():
+    client = GigaChatClient(limit=3)
+    session = await client.get_session()
+    assert await client.get_session() is session
+    assert session.connector.limit == 3
+
+    await client.close()
+    assert session.closed
+    assert await client.get_session() is not session
+    await client.close()
+
+
+class CountingTokenManager(TokenManager):
+    def __init__(self, lifetime):
+        super().__init__(refresh_margin=60)
+        self.lifetime = lifetime
+        self.requests = 0
+
+    async def _request_token(self):
+        self.requests += 1
+        await asyncio.sleep(0.01)
+        return f"token-{self.requests}", time.time() + self.lifetime
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_token_request():
+    manager = CountingTokenManager(lifetime=1800)
+
+    tokens = await asyncio.gather(*(manager.get_token() for _ in range(20)))
+
+    assert manager.requests == 1
+    assert set(tokens) == {"token-1"}
+
+
+@pytest.mark.asyncio
+async def test_token_close_to_expiry_is_refreshed_in_background():
+    manager = CountingTokenManager(lifetime=30)
+    assert await manager.get_token() == "token-1"
+
+    # токен ещё действует: отдаётся сразу, новый запрашивается в фоне
+    assert await manager.get_token() == "token-1"
+    await manager._refresh_task
+
+    assert manager.requests == 2
+    assert manager.access_token == "token-2"
+
+
+def test_batch_answer_parsing_keeps_only_valid_items():
+    response = 'Вот ответ:\n[{"id": 1, "answer": "Да"}, {"id": 2, "answer": "не знаю"}, {"id": 7, "answer": "нет"}]'
+
+    assert parse_batch_answer(response, 3) == {1: (True, "Да")}
+    assert parse_batch_answer("да", 3) == {}
+
+
+@pytest.mark.asyncio
+async def test_batch_falls_back_to_single_calls_for_unparsed_posts(monkeypatch):
+    requests = []
+
+    async def fake_completion(messages, max_tokens=None):
+        requests.append(messages[-1]["content"])
+        return '[{"id": 1, "answer": "нет"}, {"id": 3, "answer": "да"}]'
+
+    async def fake_classify_post(text):
+        return text == "второй", "да"
+
+    monkeypatch.setattr(ai_filter, "_chat_completion", fake_completion)
+    monkeypatch.setattr(ai_filter, "classify_post", fake_classify_post)
+
+    results = await ai_filter.classify_posts_batch(["первый", "второй", "третий"])
+
+    assert [is_scam for is_scam, _ in results] == [False, True, True]
+    assert len(requests) == 1
+    assert "### Пост 3\nтретий" in requests[0]
+
+
+@pytest.mark.asyncio
+async def test_batcher_packs_concurrent_posts_by_size_and_budget(monkeypatch):
+    batches = []
+
+    async def fake_batch(texts):
+        batches.append(texts)
+        return [(text.startswith("скам"), "да") for text in texts]
+
+    monkeypatch.setattr(ai_filter, "classify_posts_batch", fake_batch)
+    batcher = PostBatcher(max_posts=3, token_budget=20, max_wait=0.01)
+
+    texts = ["скам 1", "пост 2", "скам 3", "пост 4", "x" * 60]
+    results = await asyncio.gather(*(batcher.classify(text) for text in texts))
+
+    assert [is_scam for is_scam, _ in results] == [True, False, True, False, False]
+    # третий пост закрыл первый пакет, длинный пост не влез в бюджет второго
+    assert batches == [texts[:3], texts[3:4], texts[4:]]
+
+
+@pytest.mark.parametrize(
+    "response, verdict",
+    [
+        ("да", True),
+        ("Да.", True),
+        ("  «Да», есть признаки", True),
+        ("Нет", False),
+        ("нет, это новость", False),
+        ('{"answer": "да"}', True),
+        ("Данные недоступны", None),
+        ("Не могу ответить", None),
+        ("", None),
+    ],
+)
+def test_verdict_parsing(response, verdict):
+    assert parse_verdict(response) is verdict
+
+
+@pytest.mark.asyncio
+async def test_unparsed_answer_is_reported_as_error(monkeypatch):
+    async def fake_analyze(text):
+        return "Возможно"
+
+    monkeypatch.setattr(ai_filter, "analyze_post_with_gigachat", fake_analyze)
+
+    is_scam, answer = await ai_filter.classify_post("текст")
+
+    assert is_scam is None
+    assert ai_filter.is_api_error(answer)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_request_is_retried_after_retry_after(monkeypatch):
+    answers = [("Ошибка API: 429", True, "2"), ("Ошибка API: 503", True, None), ("нет", False, None)]
+    failures = []
+    delays = []
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=10, clock=clock)
+
+    async def fake_send(payload):
+        failures.append(breaker.failures)
+        return answers.pop(0)
+
+    async def fake_sleep(seconds):
+        delays.append(seconds)
+        clock.now += seconds
+
+    monkeypatch.setattr(ai_filter, "_send_completion", fake_send)
+    monkeypatch.setattr(ai_filter, "circuit_breaker", breaker)
+    monkeypatch.setattr(ai_filter.asyncio, "sleep", fake_sleep)
+
+    assert await ai_filter._chat_completion([]) == "нет"
+    assert delays[0] == 2
+    assert 0 <= delays[1] <= ai_filter.GIGACHAT_RETRY_BASE_DELAY * 2
+    # 429 не сбой, 503 - сбой
+    assert failures == [0, 0, 1]
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_trips_breaker_only_when_retries_run_out(monkeypatch):
+    calls = []
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=30, clock=clock)
+
+    async def fake_send(payload):
+        calls.append(breaker.failures)
+        return "Ошибка API: 429", True, "1"
+
+    async def fake_sleep(seconds):
+        clock.now += seconds
+
+    monkeypatch.setattr(ai_filter, "_send_completion", fake_send)
+    monkeypatch.setattr(ai_filter, "circuit_breaker", breaker)
+    monkeypatch.setattr(ai_filter.asyncio, "sleep", fake_sleep)
+
+    assert await ai_filter._chat_completion([]) == "Ошибка API: 429"
+    assert calls == [0] * (ai_filter.GIGACHAT_MAX_RETRIES + 1)
+    assert breaker.is_open()
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried(monkeypatch):
+    calls = []
+
+    async def fake_send(payload):
+        calls.append(payload)
+        return "Ошибка API: 400", False, None
+
+    monkeypatch.setattr(ai_filter, "_send_completion", fake_send)
+
+    assert await ai_filter._chat_completion([]) == "Ошибка API: 400"
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_pauses_after_repeated_failures():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=0.05)
+
+    breaker.record_failure()
+    assert not breaker.is_open()
+    breaker.record_failure()
+    assert breaker.is_open()
+
+    started = time.monotonic()
+    await breaker.wait()
+    assert time.monotonic() - started >= 0.04
+    breaker.record_success()
+    assert breaker.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_lets_one_probe_through_after_cooldown():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0.05)
+    passed = []
+
+    async def request(i):
+        await breaker.wait()
+        passed.append(i)
+
+    breaker.record_failure()
+    tasks = [asyncio.create_task(request(i)) for i in range(5)]
+    await asyncio.sleep(0.1)
+    assert len(passed) == 1
+
+    # неудачная проба снова открывает breaker, следующая проба - тоже одна
+    breaker.record_failure()
+    await asyncio.sleep(0.02)
+    assert len(passed) == 1
+    await asyncio.sleep(0.06)
+    assert len(passed) == 2
+
+    breaker.record_success()
+    await asyncio.gather(*tasks)
+    assert sorted(passed) == list(range(5))
@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from pyrogram.errors import ChannelInvalid
+from pyrogram.raw.types import InputPeerChannel
+
+import core.chat_cache as chat_cache
+import core.parser as parser
+
+
+class FakeStorage:
+    def __init__(self):
+        self.peers = {}
+
+    async def update_peers(self, peers):
+        for peer_id, access_hash, *_ in peers:
+            self.peers[peer_id] = access_hash
+
+    async def get_peer_by_id(self, peer_id):
+        return InputPeerChannel(channel_id=peer_id, access_hash=self.peers[peer_id])
+
+
+class FakeClient:
+    def __init__(self, name="main"):
+        self.name = name
+        self.storage = FakeStorage()
+        self.resolved = 0
+
+    async def get_chat(self, username):
+        self.resolved += 1
+        self.storage.peers[-1001] = 777
+        return SimpleNamespace(id=-1001, title="Fake channel")
+
+
+@pytest.fixture
+def rows(monkeypatch):
+    rows = {}
+
+    async def fake_get_resolved_chat(channel_link):
+        row = rows.get(channel_link)
+        return row if row and row.chat_id is not None else None
+
+    async def fake_save_resolved_chat(channel_link, chat_id, access_hash, title, resolved_by):
+        rows[channel_link] = SimpleNamespace(
+            chat_id=chat_id,
+            access_hash=access_hash,
+            title=title,
+            resolved_by=resolved_by,
+            resolved_at=datetime.now(),
+        )
+        return True
+
+    monkeypatch.setattr(chat_cache, "get_resolved_chat", fake_get_resolved_chat)
+    monkeypatch.setattr(chat_cache, "save_resolved_chat", fake_save_resolved_chat)
+    return rows
+
+
+@pytest.mark.asyncio
+async def test_second_resolve_comes_from_cache(rows):
+    client = FakeClient()
+
+    first = await chat_cache.resolve_chat(client, "https://t.me/fake", "fake")
+    client.storage.peers.clear()
+    second = await chat_cache.resolve_chat(client, "https://t.me/fake", "fake")
+
+    assert client.resolved == 1
+    assert not first.cached and second.cached
+    assert second.id == -1001 and second.title == "Fake channel"
+    # кэшированный пир снова попал в хранилище сессии
+    assert client.storage.peers[-1001] == 777
+
+
+@pytest.mark.asyncio
+async def test_cache_is_not_used_by_other_account_or_after_ttl(rows, monkeypatch):
+    await chat_cache.resolve_chat(FakeClient("main"), "https://t.me/fake", "fake")
+
+    other = FakeClient("second")
+    assert not (await chat_cache.resolve_chat(other, "https://t.me/fake", "fake")).cached
+
+    rows["https://t.me/fake"].resolved_at = datetime.now() - timedelta(days=365)
+    monkeypatch.setattr(chat_cache, "CHAT_CACHE_TTL_DAYS", 30)
+    client = FakeClient("second")
+    assert not (await chat_cache.resolve_chat(client, "https://t.me/fake", "fake")).cached
+    assert client.resolved == 1
+
+
+@pytest.mark.asyncio
+async def test_parse_channel_resolves_again_on_peer_error(rows, monkeypatch):
+    client = FakeClient()
+    await chat_cache.resolve_chat(client, "https://t.me/fake", "fake")
+    histories = []
+
+    async def get_chat_history(chat_id, limit=0, offset_id=0):
+        histories.append(chat_id)
+        if len(histories) == 1:
+            raise ChannelInvalid()
+        return
+        yield
+
+    async def no_mark(channel, *args):
+        return None
+
+    client.get_chat_history = get_chat_history
+    monkeypatch.setattr(parser, "get_last_post_id", no_mark)
+    monkeypatch.setattr(parser, "update_last_post_id", no_mark)
+
+    assert await parser.parse_channel("https://t.me/fake", client=client) == 0
+    # первая попытка по кэшу, вторая после нового резолва
+    assert histories == [-1001, -1001]
+    assert client.resolved == 2
@@ -0,0 +1,157 @@
+import asyncio
+import pytest
+
+import core.checking as checking
+from core.prefilter import Prefilter
+from core.ai_filter import VerdictUnavailable
+
+
+@pytest.fixture
+def leases():
+    return {}
+
+
+@pytest.fixture
+def unchecked(monkeypatch, leases):
+    posts = {i: f"post {i}" for i in range(1, 31)}
+
+    async def fake_claim_unchecked_posts(worker_id, limit, lease_seconds):
+        ids = sorted(i for i in posts if i not in leases)[:limit]
+        leases.update((i, worker_id) for i in ids)
+        return [(i, posts[i]) for i in ids]
+
+    async def fake_release_posts(worker_id):
+        for i in [i for i, owner in leases.items() if owner == worker_id]:
+            del leases[i]
+
+    monkeypatch.setattr(checking, "claim_unchecked_posts", fake_claim_unchecked_posts)
+    monkeypatch.setattr(checking, "release_posts", fake_release_posts)
+    return posts
+
+
+@pytest.mark.asyncio
+async def test_unchecked_posts_are_checked_concurrently(unchecked, leases, monkeypatch):
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fake_check_and_mark(post_id, text, local_score=None):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        if post_id == 13:
+            raise RuntimeError("api down")
+        unchecked.pop(post_id)
+        return post_id % 10 == 0
+
+    monkeypatch.setattr(checking, "check_and_mark", fake_check_and_mark)
+
+    progress = []
+
+    async def on_progress(stats):
+        progress.append(stats["checked"] + stats["errors"])
+
+    stats = await checking.check_unchecked_posts(concurrency=4, on_progress=on_progress)
+
+    assert stats == {"checked": 29, "scam": 3, "errors": 1}
+    assert max_in_flight == 4
+    # пока аренда поста с ошибкой не истекла (в фейке она не истекает), его не берут
+    # снова, а после запуска аренда снята
+    assert list(unchecked) == [13]
+    assert progress[-1] == 30
+    assert leases == {}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_runs_check_disjoint_posts(unchecked, leases, monkeypatch):
+    checked = []
+
+    async def fake_check_and_mark(post_id, text, local_score=None):
+        checked.append(post_id)
+        await asyncio.sleep(0.001)
+        unchecked.pop(post_id)
+        return False
+
+    monkeypatch.setattr(checking, "check_and_mark", fake_check_and_mark)
+
+    first, second = await asyncio.gather(
+        checking.check_unchecked_posts(concurrency=2),
+        checking.check_unchecked_posts(concurrency=3),
+    )
+
+    assert first["checked"] + second["checked"] == 30
+    assert sorted(checked) == list(range(1, 31))
+
+
+@pytest.mark.asyncio
+async def test_stop_leaves_remaining_posts_unchecked(unchecked, monkeypatch):
+    checked = []
+
+    async def fake_check_and_mark(post_id, text, local_score=None):
+        checked.append(post_id)
+        return False
+
+    monkeypatch.setattr(checking, "check_and_mark", fake_check_and_mark)
+
+    stats = await checking.check_unchecked_posts(
+        concurrency=2, should_stop=lambda: len(checked) >= 5
+    )
+
+    assert stats["checked"] == len(checked) == 5
+
+
+@pytest.mark.asyncio
+async def test_cached_verdict_skips_classification(monkeypatch):
+    marked = []
+
+    class FakeCache:
+        async def get(self, text):
+            return True
+
+    class FailingBatcher:
+        async def classify(self, text):
+            raise AssertionError("cached text must not be classified")
+
+    async def fake_mark(post_id, is_scam, verdict_source=None):
+        marked.append((post_id, is_scam, verdict_source))
+
+    monkeypatch.setattr(
+        checking, "prefilter", Prefilter(trigger_words=[], signal_patterns=[], min_words=0,
+                                         clear_without_signals=False)
+    )
+    monkeypatch.setattr(checking, "verdict_cache", FakeCache())
+    monkeypatch.setattr(checking, "post_batcher", FailingBatcher())
+    monkeypatch.setattr(checking, "mark_post_as_checked", fake_mark)
+
+    assert await checking.check_and_mark(7, "repost") is True
+    assert marked == [(7, True, "cache")]
+
+
+@pytest.mark.asyncio
+async def test_post_without_verdict_stays_unchecked(monkeypatch):
+    marked = []
+
+    class FailingBatcher:
+        async def classify(self, text):
+            return None, "Ошибка API: 503"
+
+    class EmptyCache:
+        async def get(self, text):
+            return None
+
+    async def fake_mark(post_id, is_scam, **kwargs):
+        marked.append(post_id)
+
+    monkeypatch.setattr(
+        checking, "prefilter", Prefilter(trigger_words=[], signal_patterns=[], min_words=0,
+                                         clear_without_signals=False)
+    )
+    monkeypatch.setattr(checking, "verdict_cache", EmptyCache())
+    monkeypatch.setattr(checking, "post_batcher", FailingBatcher())
+    monkeypatch.setattr(checking, "mark_post_as_checked", fake_mark)
+    monkeypatch.setattr(checking.local_classifier, "model", None)
+
+    with pytest.raises(VerdictUnavailable):
+        await checking.check_and_mark(7, "короткий")
+    assert marked == []
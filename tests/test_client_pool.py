@@ -0,0 +1,51 @@
+from collections import Counter
+
+from core.client_pool import ClientPool
+
+
+class FakeClient:
+    def __init__(self, name, flood_wait=0.0):
+        self.name = name
+        self.flood_wait = flood_wait
+
+    def flood_wait_remaining(self):
+        return self.flood_wait
+
+
+CHANNELS = [f"@channel_{i}" for i in range(1000)]
+
+
+def test_channels_are_spread_between_accounts():
+    pool = ClientPool([FakeClient(f"session_{i}") for i in range(4)])
+
+    shares = Counter(pool.client_for(channel).name for channel in CHANNELS)
+
+    assert len(shares) == 4
+    assert min(shares.values()) > 150
+
+
+def test_adding_account_moves_only_its_share():
+    clients = [FakeClient(f"session_{i}") for i in range(3)]
+    before = ClientPool(clients)
+    after = ClientPool(clients + [FakeClient("session_3")])
+
+    moved = [c for c in CHANNELS if before.owner_of(c).name != after.owner_of(c).name]
+
+    assert all(after.owner_of(c).name == "session_3" for c in moved)
+    assert len(moved) < len(CHANNELS) / 2
+
+
+def test_account_in_flood_wait_is_skipped():
+    clients = [FakeClient(f"session_{i}") for i in range(3)]
+    pool = ClientPool(clients)
+    channel = CHANNELS[0]
+    owner = pool.owner_of(channel)
+
+    owner.flood_wait = 300
+
+    assert pool.client_for(channel) is not owner
+    # когда все аккаунты во FloodWait, берём тот, что освободится раньше
+    for client in clients:
+        client.flood_wait = 300
+    clients[1].flood_wait = 10
+    assert pool.client_for(channel) is clients[1]
@@ -1,10 +1,34 @@
+import csv
+import os
+import sqlite3
+import subprocess
+import sys
 import pytest
-from datetime import datetime
-from sqlalchemy import select
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from database.database import get_db_session
-from database.models import Post
-from database.db_commands import save_post
+from database.models import Post, PostCounter, post_content_hash
+from database.db_commands import (
+    save_post,
+    save_posts_many,
+    get_last_post_id,
+    update_last_post_id,
+    mark_post_as_checked,
+    find_near_duplicate_verdict,
+    claim_unchecked_posts,
+    release_posts,
+    get_stats,
+    reconcile_post_counters,
+    export_data_to_csv,
+    export_data_to_excel,
+)
+import database.db_commands as db_commands
+from utils.minhash import lsh_bands
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
 @pytest.mark.asyncio
@@ -25,3 +49,277 @@ async def test_save_new_post():
             )
         )
         assert saved_post.scalar_one_or_none() is not None
+
+
+@pytest.mark.asyncio
+async def test_last_post_id_only_moves_forward():
+    channel_link = "@test_parsing_state"
+
+    assert await get_last_post_id(channel_link) is None
+
+    assert await update_last_post_id(channel_link, 10) == True
+    assert await update_last_post_id(channel_link, 7) == True
+    assert await get_last_post_id(channel_link) == 10
+
+    assert await update_last_post_id(channel_link, 15) == True
+    assert await get_last_post_id(channel_link) == 15
+
+
+@pytest.mark.asyncio
+async def test_save_posts_many_skips_duplicates():
+    posts = [
+        dict(
+            check_date=datetime.now(),
+            post_date=datetime.now(),
+            channel_link="test_bulk_channel",
+            post_link=f"test_bulk_link_{i % 3}",
+            post_text="bulk text",
+        )
+        for i in range(5)
+    ]
+
+    assert await save_posts_many(posts) == 3
+    assert await save_posts_many(posts) == 0
+    assert await save_posts_many([]) == 0
+
+
+@pytest.mark.asyncio
+async def test_save_posts_many_raises_on_db_error(monkeypatch):
+    async def failing_execute(self, *args, **kwargs):
+        raise SQLAlchemyError("database is locked")
+
+    monkeypatch.setattr(AsyncSession, "execute", failing_execute)
+    post = dict(channel_link="test_bulk_channel", post_link="test_failed_link", post_text="text")
+
+    # сохранение пачки не должно выглядеть как пачка дублей
+    with pytest.raises(SQLAlchemyError):
+        await save_posts_many([post])
+
+
+@pytest.mark.asyncio
+async def test_same_post_link_with_new_text_is_kept():
+    def post(text):
+        return dict(
+            check_date=datetime.now(),
+            post_date=datetime.now(),
+            channel_link="test_hash_channel",
+            post_link="test_hash_link",
+            post_text=text,
+        )
+
+    assert await save_posts_many([post("first text")]) == 1
+    # отредактированный пост - новая версия, тот же текст - дубль по content_hash
+    assert await save_posts_many([post("edited text")]) == 1
+    assert await save_posts_many([post("first text"), post("edited text")]) == 0
+    assert await save_post(
+        datetime.now(), datetime.now(), "test_hash_channel", "test_hash_link", "first text"
+    ) == False
+
+    async with get_db_session() as session:
+        texts = await session.scalars(
+            select(Post.post_text).where(Post.post_link == "test_hash_link").order_by(Post.id)
+        )
+        assert texts.all() == ["first text", "edited text"]
+
+
+def alembic_upgrade(db_path, revision):
+    env = dict(os.environ, DB_URL=f"sqlite+aiosqlite:///{db_path}")
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", revision],
+        cwd=ROOT_DIR, env=env, check=True, capture_output=True,
+    )
+
+
+def test_content_hash_migration_backfills_and_drops_duplicates(tmp_path):
+    db_path = tmp_path / "migration.db"
+    alembic_upgrade(db_path, "5b1d0c7e9a42")
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO posts (id, check_date, channel_link, post_link, post_text, "
+            "is_recipe, is_processed) VALUES (?, '2024-01-01', 'c', ?, ?, 0, 0)",
+            [
+                (1, "link_1", "text"),
+                (2, "link_1", "text"),
+                (3, "link_1", "edited text"),
+                (4, "link_2", "text"),
+                (5, "link_2", None),
+                (6, "link_2", None),
+            ],
+        )
+
+    alembic_upgrade(db_path, "9e4f2a6c1d83")
+
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT id, content_hash FROM posts ORDER BY id").fetchall()
+        # из дублей остаётся самый ранний пост, хэш совпадает с хэшем приложения
+        assert [post_id for post_id, _ in rows] == [1, 3, 4, 5]
+        assert dict(rows) == {
+            1: post_content_hash("text"),
+            3: post_content_hash("edited text"),
+            4: post_content_hash("text"),
+            5: post_content_hash(None),
+        }
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute(
+                "INSERT INTO posts (check_date, channel_link, post_link, post_text, "
+                "content_hash, is_recipe, is_processed) "
+                "VALUES ('2024-01-01', 'c', 'link_1', 'text', ?, 0, 0)",
+                (post_content_hash("text"),),
+            )
+
+
+@pytest.mark.asyncio
+async def test_near_duplicate_inherits_checked_verdict():
+    original = (
+        "Схема для заработка создаем три аккаунта и переводим деньги на них, "
+        "с помощью фейкового эмейла пишем в поддержку и получаем бонус"
+    )
+    repost = original + " подписывайтесь"
+
+    await save_posts_many(
+        [dict(channel_link="test_near_dup", post_link="test_near_dup_1", post_text=original)]
+    )
+    async with get_db_session() as session:
+        result = await session.execute(
+            select(Post.id).where(Post.post_link == "test_near_dup_1")
+        )
+        post_id = result.scalar_one()
+
+    bands = lsh_bands(repost)
+    assert await find_near_duplicate_verdict(repost, bands) is None
+
+    await mark_post_as_checked(post_id, True, verdict_source="llm")
+    assert await find_near_duplicate_verdict(repost, bands) == (post_id, True)
+    assert await find_near_duplicate_verdict(repost, bands, exclude_id=post_id) is None
+
+
+@pytest.mark.asyncio
+async def test_near_duplicate_ignores_prefilter_and_local_verdicts():
+    original = (
+        "Сегодня в городе открыли новый мост через реку, движение по нему начнётся "
+        "в понедельник, а старый мост закроют на ремонт до конца осени этого года"
+    )
+    routed_to_llm = original + " пиши в лс"
+
+    await save_posts_many([
+        dict(channel_link="test_near_dup", post_link=f"test_near_dup_clean_{i}", post_text=original)
+        for i in range(2)
+    ])
+    async with get_db_session() as session:
+        result = await session.scalars(
+            select(Post.id).where(Post.post_link.like("test_near_dup_clean_%")).order_by(Post.id)
+        )
+        prefilter_id, local_id = result.all()
+    await mark_post_as_checked(prefilter_id, False, verdict_source="prefilter:no_signals")
+    await mark_post_as_checked(local_id, False, verdict_source="local_model")
+
+    # дополненный призывом пост префильтр отправил в GigaChat, вердикт двойника не годится
+    assert await find_near_duplicate_verdict(routed_to_llm, lsh_bands(routed_to_llm)) is None
+
+
+@pytest.mark.asyncio
+async def test_claimed_posts_are_leased_to_one_worker():
+    await save_posts_many(
+        [dict(channel_link="test_lease", post_link=f"test_lease_{i}", post_text=f"lease {i}")
+         for i in range(3)]
+    )
+    async with get_db_session() as session:
+        result = await session.execute(select(Post.id).where(Post.channel_link == "test_lease"))
+        ids = set(result.scalars().all())
+
+    first = {post_id for post_id, _ in await claim_unchecked_posts("first", 1000, 60)}
+    second = {post_id for post_id, _ in await claim_unchecked_posts("second", 1000, 60)}
+    assert ids <= first
+    assert not ids & second
+
+    # просроченную аренду забирает другой воркер
+    async with get_db_session() as session:
+        await session.execute(
+            update(Post).where(Post.id.in_(ids))
+            .values(lease_expires_at=datetime.now() - timedelta(seconds=1))
+        )
+        await session.commit()
+    second = {post_id for post_id, _ in await claim_unchecked_posts("second", 1000, 60)}
+    assert ids <= second
+
+    checked_id = min(ids)
+    await mark_post_as_checked(checked_id, False, verdict_source="llm")
+    await release_posts("first")
+    assert await release_posts("second") >= len(ids) - 1
+    async with get_db_session() as session:
+        result = await session.execute(
+            select(Post.claimed_by).where(Post.id.in_(ids))
+        )
+        assert set(result.scalars().all()) == {None}
+
+
+@pytest.mark.asyncio
+async def test_counters_follow_ingest_and_verdicts():
+    before = await get_stats()
+
+    await save_posts_many(
+        [dict(channel_link="test_counters", post_link=f"test_counters_{i}", post_text=f"counter {i}")
+         for i in range(3)]
+    )
+    async with get_db_session() as session:
+        result = await session.execute(
+            select(Post.id).where(Post.channel_link == "test_counters").order_by(Post.id)
+        )
+        first, second, _ = result.scalars().all()
+
+    await mark_post_as_checked(first, True, verdict_source="llm")
+    await mark_post_as_checked(second, True, verdict_source="llm")
+    # повторный вердикт меняет только разницу
+    await mark_post_as_checked(second, False, verdict_source="llm")
+
+    after = await get_stats()
+    assert after["total_posts"] - before["total_posts"] == 3
+    assert after["unchecked"] - before["unchecked"] == 1
+    assert after["recipes"] - before["recipes"] == 1
+    assert await reconcile_post_counters() == after
+
+
+@pytest.mark.asyncio
+async def test_reconcile_repairs_drifted_counters():
+    exact = await reconcile_post_counters()
+    async with get_db_session() as session:
+        await session.execute(
+            update(PostCounter).where(PostCounter.name == "unchecked").values(value=-5)
+        )
+        await session.commit()
+    assert (await get_stats())["unchecked"] == -5
+
+    assert await reconcile_post_counters() == exact
+    assert await get_stats() == exact
+
+
+@pytest.mark.asyncio
+async def test_exports_stream_all_posts_in_batches(tmp_path, monkeypatch):
+    from openpyxl import load_workbook
+
+    await save_posts_many(
+        [dict(channel_link="test_export", post_link=f"test_export_{i}", post_text=f" a;b {i}\x01 ")
+         for i in range(7)]
+    )
+    total = (await reconcile_post_counters())["total_posts"]
+    monkeypatch.setattr(db_commands, "EXPORT_BATCH_SIZE", 3)
+    monkeypatch.chdir(tmp_path)
+    progress = []
+
+    async def on_progress(rows):
+        progress.append(rows)
+
+    csv_file = await export_data_to_csv(on_progress=on_progress)
+    with open(csv_file, encoding="utf-8-sig", newline="") as file:
+        rows = list(csv.reader(file, delimiter=";"))
+    assert rows[0] == [col.name for col in Post.__table__.columns]
+    assert len(rows) == total + 1
+    assert progress[-1] == total
+    assert progress[:2] == [3, 6]
+    assert "a,b 6\x01" in {cell for row in rows for cell in row}
+
+    xlsx_file = await export_data_to_excel()
+    sheet = load_workbook(xlsx_file, read_only=True)["Posts"]
+    values = list(sheet.values)
+    assert len(values) == total + 1
+    assert "a;b 6" in {cell for row in values for cell in row}
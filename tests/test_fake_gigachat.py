@@ -0,0 +1,52 @@
+import pytest
+import pytest_asyncio
+
+import core.ai_filter as ai_filter
+from utils.fake_gigachat import FakeGigaChat
+
+
+retry_delay = ai_filter._retry_delay
+
+
+@pytest_asyncio.fixture
+async def fake_api(monkeypatch):
+    fake = FakeGigaChat()
+    base_url = await fake.start()
+    monkeypatch.setattr(ai_filter, "GIGACHAT_OAUTH_URL", f"{base_url}/api/v2/oauth")
+    monkeypatch.setattr(ai_filter, "GIGACHAT_API_URL", f"{base_url}/api/v1")
+    monkeypatch.setattr(ai_filter, "token_manager", ai_filter.TokenManager())
+    monkeypatch.setattr(ai_filter, "circuit_breaker", ai_filter.CircuitBreaker())
+    monkeypatch.setattr(ai_filter, "_retry_delay", lambda attempt, retry_after=None: 0.01)
+    client = ai_filter.GigaChatClient()
+    monkeypatch.setattr(ai_filter, "gigachat_client", client)
+    yield fake
+    await client.close()
+    await fake.stop()
+
+
+@pytest.mark.asyncio
+async def test_single_and_batched_classification_offline(fake_api):
+    assert await ai_filter.classify_post("Быстрый заработок без вложений") == (True, "да")
+
+    results = await ai_filter.classify_posts_batch(["Погода на завтра", "Получи бонус за перевод"])
+
+    assert [is_scam for is_scam, _ in results] == [False, True]
+    assert fake_api.stats["oauth"] == 1
+    assert fake_api.stats["200"] == 2
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_is_retried_and_errors_give_no_verdict(fake_api, monkeypatch):
+    # Retry-After: 1 от сервера должен выдерживаться, иначе все повторы попадут в то же окно
+    monkeypatch.setattr(ai_filter, "_retry_delay", retry_delay)
+    fake_api.rate_limit = 1
+    assert (await ai_filter.classify_post("пост"))[0] is False
+    assert (await ai_filter.classify_post("пост"))[0] is False
+    assert fake_api.stats["429"] >= 1
+
+    monkeypatch.setattr(ai_filter, "_retry_delay", lambda attempt, retry_after=None: 0.01)
+    fake_api.rate_limit = 0
+    fake_api.error_rate = 1.0
+    is_scam, answer = await ai_filter.classify_post("пост")
+    assert is_scam is None
+    assert answer == "Ошибка API: 500"
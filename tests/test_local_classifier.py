@@ -0,0 +1,84 @@
+import random
+
+import numpy as np
+import pytest
+
+import core.local_classifier as local_classifier_module
+from core.local_classifier import LocalClassifier, evaluation_report
+from utils.linear_model import HashedLogisticRegression, vectorize
+
+SCAM_WORDS = ["заработок", "без", "вложений", "пиши", "в", "лс", "переводи", "деньги", "бонус"]
+CLEAN_WORDS = ["погода", "завтра", "дождь", "футбол", "матч", "счёт", "новости", "город", "мост"]
+
+
+def make_posts(count, seed=1):
+    rng = random.Random(seed)
+    posts = []
+    for i in range(count):
+        is_scam = i % 3 == 0
+        words = SCAM_WORDS if is_scam else CLEAN_WORDS
+        posts.append((" ".join(rng.choices(words, k=8)) + f" {i}", is_scam))
+    return posts
+
+
+def test_vectorize_keeps_bias_for_empty_texts():
+    indices, offsets, lengths = vectorize(["", "один два"])
+
+    assert lengths.tolist() == [1, 4]
+    assert indices[offsets[0]] == 0
+
+
+def test_model_separates_classes_and_survives_save(tmp_path):
+    posts = make_posts(300)
+    model = HashedLogisticRegression().fit([t for t, _ in posts], [y for _, y in posts])
+
+    probabilities = model.predict_proba(["заработок без вложений пиши в лс", "дождь над городом завтра"])
+    assert probabilities[0] > 0.9 > 0.1 > probabilities[1]
+
+    path = tmp_path / "model.npz"
+    model.save(path)
+    assert np.allclose(HashedLogisticRegression.load(path).predict_proba(["бонус"]), model.predict_proba(["бонус"]))
+
+
+def test_report_counts_llm_band():
+    report = evaluation_report([True, False, True, False], [0.99, 0.01, 0.5, 0.97], 0.05, 0.95)
+
+    assert "25.0% постов (1 из 4)" in report
+    assert "мошеннических 2 (ошибок 1)" in report
+
+
+@pytest.mark.asyncio
+async def test_retrain_uses_model_for_confident_posts_only(tmp_path, monkeypatch):
+    async def fake_get_labeled_posts():
+        return make_posts(400)
+
+    monkeypatch.setattr(local_classifier_module, "get_labeled_posts", fake_get_labeled_posts)
+    classifier = LocalClassifier(path=str(tmp_path / "model.npz"), clean_below=0.05, scam_above=0.95)
+    assert classifier.score_many(["текст"]) == [None]
+
+    report = await classifier.retrain()
+
+    assert "Порог | точность | полнота" in report
+    # переобученная модель - только кандидат, пока её не включили
+    assert classifier.score_many(["текст"]) == [None]
+    assert not LocalClassifier(path=classifier.path).load()
+
+    assert await classifier.activate()
+    assert not await classifier.activate()
+    assert LocalClassifier(path=classifier.path).load()
+    scam, clean = classifier.score_many(["переводи деньги бонус пиши в лс", "футбол матч счёт"])
+    assert classifier.decide(scam) is True
+    assert classifier.decide(clean) is False
+    assert classifier.decide(0.5) is None
+
+
+@pytest.mark.asyncio
+async def test_retrain_needs_enough_labels(tmp_path, monkeypatch):
+    async def fake_get_labeled_posts():
+        return make_posts(10)
+
+    monkeypatch.setattr(local_classifier_module, "get_labeled_posts", fake_get_labeled_posts)
+    classifier = LocalClassifier(path=str(tmp_path / "model.npz"))
+
+    assert "Недостаточно" in await classifier.retrain()
+    assert classifier.model is None
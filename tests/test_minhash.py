@@ -0,0 +1,33 @@
+from utils.minhash import NUM_BANDS, lsh_bands, lsh_columns
+
+TEXT = (
+    "Погибли все пассажиры и члены экипажа. Самолет эксплуатировался почти полвека, "
+    "что вновь поставило вопрос о допустимых сроках службы устаревшей советской авиатехники"
+)
+OTHER = (
+    "Что означает для рынка решение крупнейшего российского ретейлера остановить "
+    "отгрузки продукции одного из крупнейших производителей кондитерских изделий в мире"
+)
+
+
+def shared_bands(first, second):
+    return sum(a == b for a, b in zip(lsh_bands(first), lsh_bands(second)))
+
+
+def test_small_edit_shares_bands_and_other_text_does_not():
+    edited = TEXT.replace("почти полвека", "почти 50 лет")
+    assert shared_bands(TEXT, edited) > 0
+    assert shared_bands(TEXT, OTHER) == 0
+
+
+def test_case_and_punctuation_do_not_change_bands():
+    assert lsh_bands(TEXT) == lsh_bands(TEXT.upper().replace(",", " ").replace(".", "!"))
+
+
+def test_short_text_has_no_bands():
+    assert lsh_bands("Купи слона") is None
+    assert lsh_columns(None) == {f"lsh_band{i}": None for i in range(NUM_BANDS)}
+
+
+def test_bands_fit_signed_bigint():
+    assert all(-(1 << 63) <= band < (1 << 63) for band in lsh_bands(TEXT))
@@ -0,0 +1,297 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from pyrogram.errors import FloodWait
+from sqlalchemy.exc import SQLAlchemyError
+
+import core.parser as parser
+from core.chat_cache import ResolvedChat
+from core.client_pool import ClientPool
+
+
+@pytest.fixture(autouse=True)
+def no_chat_cache(monkeypatch):
+    async def fake_resolve_chat(client, channel_link, username):
+        chat = await client.get_chat(username)
+        return ResolvedChat(chat.id, chat.title, cached=False)
+
+    monkeypatch.setattr(parser, "resolve_chat", fake_resolve_chat)
+
+
+@pytest.mark.asyncio
+async def test_parse_channels_respects_concurrency(monkeypatch):
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fake_parse_channel(channel, **kwargs):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return len(channel)
+
+    monkeypatch.setattr(parser, "parse_channel", fake_parse_channel)
+
+    channels = [f"@channel_{i}" for i in range(10)]
+    result = await parser.parse_channels(channels, concurrency=3)
+
+    assert max_in_flight == 3
+    assert result == {channel: len(channel) for channel in channels}
+
+
+@pytest.mark.asyncio
+async def test_parse_channels_failed_channel_counts_zero(monkeypatch):
+    async def fake_parse_channel(channel, **kwargs):
+        if channel == "@broken":
+            raise RuntimeError("boom")
+        return 5
+
+    monkeypatch.setattr(parser, "parse_channel", fake_parse_channel)
+
+    result = await parser.parse_channels(["@ok", "@broken"], concurrency=2)
+
+    assert result == {"@ok": 5, "@broken": 0}
+
+
+@pytest.mark.asyncio
+async def test_parse_channels_reports_progress(monkeypatch):
+    async def fake_parse_channel(channel, sink=None, **kwargs):
+        if channel == "@broken":
+            raise RuntimeError("boom")
+        return await sink([{"post_link": f"{channel}/1"}, {"post_link": f"{channel}/2"}])
+
+    async def fake_save_posts_many(batch):
+        return len(batch)
+
+    progress = []
+
+    async def on_progress(counters):
+        progress.append(dict(counters))
+
+    monkeypatch.setattr(parser, "parse_channel", fake_parse_channel)
+    monkeypatch.setattr(parser, "save_posts_many", fake_save_posts_many)
+
+    await parser.parse_channels(["@ok", "@broken"], concurrency=1, on_progress=on_progress)
+
+    assert progress[-1] == {"channels": 2, "errors": 1, "saved": 2}
+
+
+class FakeMessage:
+    def __init__(self, message_id):
+        self.id = message_id
+        self.date = datetime.now()
+        self.link = f"https://t.me/fake/{message_id}"
+        self.text = f"post {message_id}"
+        self.forward_from_chat = None
+        self.forward_from = None
+
+
+class FakeClient:
+    def __init__(self, message_ids, fail_on=None):
+        self.message_ids = message_ids
+        self.fail_on = fail_on
+
+    async def get_chat(self, channel):
+        return SimpleNamespace(id=1, title=channel)
+
+    async def get_chat_history(self, chat_id, limit=0, offset_id=0):
+        older = [i for i in self.message_ids if not offset_id or i < offset_id]
+        for message_id in older[: limit or None]:
+            if message_id == self.fail_on:
+                self.fail_on = None
+                raise RuntimeError("connection lost")
+            yield FakeMessage(message_id)
+
+
+@pytest.mark.asyncio
+async def test_incremental_parse_stops_at_last_post_id(monkeypatch):
+    saved_links = []
+    marks = {"@fake": 5}
+
+    async def fake_save_posts_many(posts):
+        saved_links.extend(post["post_link"] for post in posts)
+        return len(posts)
+
+    async def fake_get_last_post_id(channel):
+        return marks.get(channel)
+
+    async def fake_update_last_post_id(channel, post_id):
+        marks[channel] = post_id
+        return True
+
+    monkeypatch.setattr(parser, "telegram_client", FakeClient([8, 7, 6, 5, 4]))
+    monkeypatch.setattr(parser, "save_posts_many", fake_save_posts_many)
+    monkeypatch.setattr(parser, "get_last_post_id", fake_get_last_post_id)
+    monkeypatch.setattr(parser, "update_last_post_id", fake_update_last_post_id)
+
+    saved = await parser.parse_channel("@fake", limit=2, incremental=True)
+
+    assert saved == 3
+    assert saved_links == [f"https://t.me/fake/{i}" for i in (8, 7, 6)]
+    assert marks["@fake"] == 8
+
+
+@pytest.mark.asyncio
+async def test_failed_save_keeps_last_post_id(monkeypatch):
+    marks = {"@fake": 5}
+
+    async def failing_save_posts_many(posts):
+        raise SQLAlchemyError("database is locked")
+
+    async def fake_get_last_post_id(channel):
+        return marks.get(channel)
+
+    async def fake_update_last_post_id(channel, post_id):
+        marks[channel] = post_id
+        return True
+
+    monkeypatch.setattr(parser, "telegram_client", FakeClient([9, 8, 7, 6, 5, 4]))
+    monkeypatch.setattr(parser, "save_posts_many", failing_save_posts_many)
+    monkeypatch.setattr(parser, "get_last_post_id", fake_get_last_post_id)
+    monkeypatch.setattr(parser, "update_last_post_id", fake_update_last_post_id)
+
+    assert await parser.parse_channel("@fake", incremental=True) == 0
+    # посты 6-9 не сохранены, следующий запуск заберёт их снова
+    assert marks["@fake"] == 5
+
+
+@pytest.mark.asyncio
+async def test_channel_moves_to_another_account_on_flood_wait(monkeypatch):
+    flooded = SimpleNamespace(name="flooded", wait=0.0)
+    healthy = SimpleNamespace(name="healthy", wait=0.0)
+    for client in (flooded, healthy):
+        client.flood_wait_remaining = lambda client=client: client.wait
+    used = []
+
+    async def fake_parse_channel(channel, client=None, **kwargs):
+        used.append(client.name)
+        if client is flooded:
+            flooded.wait = 300
+            raise FloodWait(value=300)
+        return 7
+
+    pool = ClientPool([flooded, healthy])
+    monkeypatch.setattr(pool, "_ring_order", lambda channel: [flooded, healthy])
+    monkeypatch.setattr(parser, "client_pool", pool)
+    monkeypatch.setattr(parser, "parse_channel", fake_parse_channel)
+
+    result = await parser.parse_channels(["@channel"])
+
+    assert result == {"@channel": 7}
+    assert used == ["flooded", "healthy"]
+
+
+@pytest.mark.asyncio
+async def test_channel_flooded_on_every_account_counts_as_error(monkeypatch, caplog):
+    clients = [SimpleNamespace(name=f"account_{i}", wait=0.0) for i in range(2)]
+    for client in clients:
+        client.flood_wait_remaining = lambda client=client: client.wait
+    used = []
+    reports = []
+
+    async def fake_parse_channel(channel, client=None, **kwargs):
+        used.append(client.name)
+        client.wait = 300
+        raise FloodWait(value=300)
+
+    async def on_progress(progress):
+        reports.append(dict(progress))
+
+    pool = ClientPool(clients)
+    monkeypatch.setattr(parser, "client_pool", pool)
+    monkeypatch.setattr(parser, "parse_channel", fake_parse_channel)
+
+    result = await parser.parse_channels(["@channel"], on_progress=on_progress)
+
+    assert result == {"@channel": 0}
+    # каждый аккаунт и последняя попытка на том, что раньше освободится
+    assert len(used) == 3
+    assert reports[-1] == {"channels": 1, "errors": 1, "saved": 0}
+    assert "every account is in FloodWait" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_all_time_backfill_resumes_from_checkpoint(monkeypatch):
+    saved_ids = []
+    checkpoints = {}
+
+    async def fake_save_posts_many(posts):
+        saved_ids.extend(int(post["post_link"].rsplit("/", 1)[1]) for post in posts)
+        return len(posts)
+
+    async def fake_get_backfill_checkpoint(channel):
+        values = checkpoints.get(channel)
+        return SimpleNamespace(**values) if values else None
+
+    async def fake_save_backfill_checkpoint(channel, **values):
+        checkpoints.setdefault(channel, {}).update(values)
+        return True
+
+    async def no_mark(channel, *args):
+        return None
+
+    monkeypatch.setattr(parser, "BACKFILL_CHECKPOINT_EVERY", 2)
+    monkeypatch.setattr(parser, "save_posts_many", fake_save_posts_many)
+    monkeypatch.setattr(parser, "get_backfill_checkpoint", fake_get_backfill_checkpoint)
+    monkeypatch.setattr(parser, "save_backfill_checkpoint", fake_save_backfill_checkpoint)
+    monkeypatch.setattr(parser, "get_last_post_id", no_mark)
+    monkeypatch.setattr(parser, "update_last_post_id", no_mark)
+
+    history = list(range(10, 0, -1))
+    client = FakeClient(history, fail_on=5)
+
+    # первый запуск обрывается на сообщении 5, чекпоинт стоит после 7
+    assert await parser.parse_channel("@fake", all_time=True, client=client) == 0
+    assert checkpoints["@fake"]["offset_id"] == 7
+    assert checkpoints["@fake"]["status"] == "running"
+    assert "@fake" not in parser.running_backfills
+
+    saved_ids.clear()
+    saved = await parser.parse_channel("@fake", all_time=True, client=client)
+
+    assert saved_ids == [6, 5, 4, 3, 2, 1]
+    assert saved == 6
+    assert checkpoints["@fake"]["status"] == "done"
+    assert checkpoints["@fake"]["fetched_count"] == 10
+    assert checkpoints["@fake"]["start_post_id"] == 10
+
+
+@pytest.mark.asyncio
+async def test_failed_backfill_flush_keeps_checkpoint(monkeypatch):
+    checkpoints = {}
+    flushes = 0
+
+    async def fake_save_posts_many(posts):
+        nonlocal flushes
+        flushes += 1
+        if flushes == 2:
+            raise SQLAlchemyError("database is locked")
+        return len(posts)
+
+    async def fake_get_backfill_checkpoint(channel):
+        values = checkpoints.get(channel)
+        return SimpleNamespace(**values) if values else None
+
+    async def fake_save_backfill_checkpoint(channel, **values):
+        checkpoints.setdefault(channel, {}).update(values)
+        return True
+
+    async def no_mark(channel, *args):
+        return None
+
+    monkeypatch.setattr(parser, "BACKFILL_CHECKPOINT_EVERY", 2)
+    monkeypatch.setattr(parser, "save_posts_many", fake_save_posts_many)
+    monkeypatch.setattr(parser, "get_backfill_checkpoint", fake_get_backfill_checkpoint)
+    monkeypatch.setattr(parser, "save_backfill_checkpoint", fake_save_backfill_checkpoint)
+    monkeypatch.setattr(parser, "get_last_post_id", no_mark)
+    monkeypatch.setattr(parser, "update_last_post_id", no_mark)
+
+    client = FakeClient(list(range(10, 0, -1)))
+
+    assert await parser.parse_channel("@fake", all_time=True, client=client) == 0
+    # сообщения 8 и 7 не записаны: чекпоинт остался после 9, бэкфилл не завершён
+    assert checkpoints["@fake"]["offset_id"] == 9
+    assert checkpoints["@fake"]["status"] == "running"
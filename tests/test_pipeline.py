@@ -0,0 +1,157 @@
+import asyncio
+import pytest
+
+import core.pipeline as pipeline
+
+
+@pytest.mark.asyncio
+async def test_pipeline_saves_and_checks_every_new_post(monkeypatch):
+    checked = {}
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fake_get_active_channels():
+        return ["@one", "@two"]
+
+    async def fake_parse_channels(channels, sink=None, **kwargs):
+        for channel in channels:
+            for start in range(0, 10, 5):
+                await sink(
+                    [{"post_link": f"{channel}/{i}"} for i in range(start, start + 5)]
+                )
+
+    async def fake_insert_new_posts(batch, **kwargs):
+        return [(post["post_link"], f"text {post['post_link']}") for post in batch]
+
+    async def fake_check_and_mark(post_id, text, local_score=None):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        checked[post_id] = text.endswith("/0")
+        return checked[post_id]
+
+    monkeypatch.setattr(pipeline, "get_active_channels", fake_get_active_channels)
+    monkeypatch.setattr(pipeline, "parse_channels", fake_parse_channels)
+    monkeypatch.setattr(pipeline, "insert_new_posts", fake_insert_new_posts)
+    monkeypatch.setattr(pipeline, "check_and_mark", fake_check_and_mark)
+    monkeypatch.setattr(pipeline, "release_posts", lambda worker_id: asyncio.sleep(0))
+
+    stats = await pipeline.run_pipeline(check_concurrency=2, queue_size=1)
+
+    assert stats == {"saved": 20, "checked": 20, "scam": 2}
+    assert len(checked) == 20
+    assert max_in_flight <= 2
+
+
+@pytest.mark.asyncio
+async def test_pipeline_leaves_posts_unchecked_when_stopped(monkeypatch):
+    async def fake_get_active_channels():
+        return ["@one"]
+
+    async def fake_parse_channels(channels, sink=None, **kwargs):
+        await sink([{"post_link": "@one/1"}, {"post_link": "@one/2"}])
+
+    claims = []
+    released = []
+
+    async def fake_insert_new_posts(batch, claimed_by=None, lease_seconds=0, raise_errors=False):
+        claims.append(claimed_by)
+        return [(post["post_link"], "text") for post in batch]
+
+    async def fake_release_posts(worker_id):
+        released.append(worker_id)
+
+    async def fail_check_and_mark(post_id, text, local_score=None):
+        raise AssertionError("posts must not be checked after stop")
+
+    monkeypatch.setattr(pipeline, "get_active_channels", fake_get_active_channels)
+    monkeypatch.setattr(pipeline, "parse_channels", fake_parse_channels)
+    monkeypatch.setattr(pipeline, "insert_new_posts", fake_insert_new_posts)
+    monkeypatch.setattr(pipeline, "check_and_mark", fail_check_and_mark)
+    monkeypatch.setattr(pipeline, "release_posts", fake_release_posts)
+
+    stats = await pipeline.run_pipeline(should_stop=lambda: True)
+
+    assert stats == {"saved": 2, "checked": 0, "scam": 0}
+    # новые посты записаны с арендой этого запуска, а в конце аренда снята
+    assert claims[0] is not None
+    assert released == claims
+
+
+@pytest.mark.asyncio
+async def test_sink_returns_only_after_batch_is_stored(monkeypatch):
+    sink_results = []
+
+    async def fake_get_active_channels():
+        return ["@one"]
+
+    async def fake_parse_channels(channels, sink=None, **kwargs):
+        # дубликат в первой пачке не записан, вторая пачка падает в БД
+        sink_results.append(await sink([{"post_link": "@one/1"}, {"post_link": "@one/1"}]))
+        try:
+            await sink([{"post_link": "@one/2"}])
+        except RuntimeError as e:
+            sink_results.append(str(e))
+
+    async def fake_insert_new_posts(batch, raise_errors=False, **kwargs):
+        assert raise_errors
+        if batch[0]["post_link"] == "@one/2":
+            raise RuntimeError("db is down")
+        return [(batch[0]["post_link"], "text")]
+
+    async def fake_check_and_mark(post_id, text, local_score=None):
+        return False
+
+    monkeypatch.setattr(pipeline, "get_active_channels", fake_get_active_channels)
+    monkeypatch.setattr(pipeline, "parse_channels", fake_parse_channels)
+    monkeypatch.setattr(pipeline, "insert_new_posts", fake_insert_new_posts)
+    monkeypatch.setattr(pipeline, "check_and_mark", fake_check_and_mark)
+    monkeypatch.setattr(pipeline, "release_posts", lambda worker_id: asyncio.sleep(0))
+
+    stats = await pipeline.run_pipeline()
+
+    # парсер видит число записанных постов и ошибку записи, а не длину пачки
+    assert sink_results == [1, "db is down"]
+    assert stats == {"saved": 1, "checked": 1, "scam": 0}
+
+
+@pytest.mark.asyncio
+async def test_writer_survives_a_failing_batch(monkeypatch):
+    checked = []
+
+    async def fake_get_active_channels():
+        return ["@one"]
+
+    async def fake_parse_channels(channels, sink=None, **kwargs):
+        for i in range(5):
+            await sink([{"post_link": f"@one/{i}"}])
+
+    async def fake_insert_new_posts(batch, **kwargs):
+        return [(batch[0]["post_link"], "text")]
+
+    def fake_score_many(texts):
+        if fake_score_many.calls == 0:
+            fake_score_many.calls += 1
+            raise RuntimeError("model file is broken")
+        return [None] * len(texts)
+
+    fake_score_many.calls = 0
+
+    async def fake_check_and_mark(post_id, text, local_score=None):
+        checked.append(post_id)
+        return False
+
+    monkeypatch.setattr(pipeline, "get_active_channels", fake_get_active_channels)
+    monkeypatch.setattr(pipeline, "parse_channels", fake_parse_channels)
+    monkeypatch.setattr(pipeline, "insert_new_posts", fake_insert_new_posts)
+    monkeypatch.setattr(pipeline.local_classifier, "score_many", fake_score_many)
+    monkeypatch.setattr(pipeline, "check_and_mark", fake_check_and_mark)
+    monkeypatch.setattr(pipeline, "release_posts", lambda worker_id: asyncio.sleep(0))
+
+    stats = await asyncio.wait_for(pipeline.run_pipeline(queue_size=1), timeout=5)
+
+    # первая пачка записана, но не проверена; остальные прошли весь путь
+    assert stats == {"saved": 5, "checked": 4, "scam": 0}
+    assert sorted(checked) == [f"@one/{i}" for i in range(1, 5)]
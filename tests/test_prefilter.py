@@ -0,0 +1,45 @@
+import pytest
+
+from core.prefilter import Prefilter
+
+
+@pytest.fixture
+def prefilter():
+    return Prefilter(
+        trigger_words=["быстрый заработок", "биткоин"],
+        signal_patterns=[("link", r"https?://"), ("bait", r"бесплатн")],
+        min_words=5,
+        clear_without_signals=True,
+    )
+
+
+@pytest.mark.parametrize(
+    "text, verdict, rule",
+    [
+        (None, False, "empty"),
+        ("🔥🔥🔥 123", False, "empty"),
+        ("Погода на завтра", False, "short"),
+        ("Курс БИТКОИНа вырос", None, "trigger:биткоин"),
+        ("Заберите бесплатно", None, "bait"),
+        ("Подробности по ссылке https://example.com", None, "link"),
+        ("Самолёт эксплуатировался почти полвека и был списан", False, "no_signals"),
+    ],
+)
+def test_rules(prefilter, text, verdict, rule):
+    result = prefilter.check(text)
+
+    assert result.verdict is verdict
+    assert result.rule == rule
+
+
+def test_long_posts_go_to_llm_when_clearing_is_off():
+    prefilter = Prefilter(trigger_words=[], signal_patterns=[], clear_without_signals=False)
+
+    assert prefilter.check("Самолёт эксплуатировался почти полвека и был списан").verdict is None
+
+
+def test_decisions_are_counted_per_rule(prefilter):
+    for text in ("", "биткоин", "биткоин растёт", "короткий пост"):
+        prefilter.check(text)
+
+    assert prefilter.stats == {"empty": 1, "trigger:биткоин": 2, "short": 1}
@@ -0,0 +1,83 @@
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+
+from core.progress import ProgressReporter, format_duration
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeStatus:
+    def __init__(self, text):
+        self.edits = [text]
+        self.fail_with = None
+
+    async def edit_text(self, text):
+        if self.fail_with:
+            error, self.fail_with = self.fail_with, None
+            raise error
+        self.edits.append(text)
+
+
+class FakeMessage:
+    def __init__(self):
+        self.sent = []
+
+    async def answer(self, text, **kwargs):
+        self.sent.append(FakeStatus(text))
+        return self.sent[-1]
+
+
+@pytest.mark.asyncio
+async def test_progress_edits_one_message_at_most_every_interval():
+    clock = FakeClock()
+    message = FakeMessage()
+    reporter = await ProgressReporter(
+        message, "Проверка", total=100, label="Проверено", interval=5, clock=clock
+    ).start()
+
+    for done in range(1, 41):
+        clock.now = done * 0.5
+        await reporter.update(done, errors=done // 20)
+
+    assert len(message.sent) == 1
+    status = message.sent[0]
+    # 20 секунд работы: правки на 5, 10, 15 и 20 секундах
+    assert len(status.edits) == 5
+    assert status.edits[-1] == (
+        "Проверка\n"
+        "Проверено: 40/100 (40%)\n"
+        "Скорость: 2.0 постов/с, осталось ~30 с\n"
+        "Ошибок: 2"
+    )
+
+
+@pytest.mark.asyncio
+async def test_flood_wait_postpones_next_edit():
+    clock = FakeClock()
+    message = FakeMessage()
+    reporter = await ProgressReporter(message, "Выгрузка", interval=1, clock=clock).start()
+    status = message.sent[0]
+
+    status.fail_with = TelegramRetryAfter(method=None, message="Flood control", retry_after=30)
+    clock.now = 2
+    await reporter.update(10)
+    clock.now = 20
+    await reporter.update(20)
+    assert len(status.edits) == 1
+
+    clock.now = 33
+    await reporter.update(30)
+    assert len(status.edits) == 2
+    assert status.edits[-1].startswith("Выгрузка\nГотово: 30\n")
+
+
+def test_format_duration():
+    assert format_duration(45) == "45 с"
+    assert format_duration(200) == "3 мин 20 с"
+    assert format_duration(3900) == "1 ч 5 мин"
@@ -0,0 +1,78 @@
+import pytest
+from types import SimpleNamespace
+
+from pyrogram.errors import FloodWait
+
+from core.rate_limiter import TokenBucket, RateLimiter, RateLimitedClient
+
+
+def test_flood_wait_lowers_rate_and_blocks_bucket():
+    bucket = TokenBucket(rate=1.0, capacity=5)
+
+    bucket.on_flood_wait(30)
+
+    assert bucket.rate == 0.5
+    assert bucket.tokens == 0
+    assert bucket.blocked_until > 0
+
+
+def test_successes_raise_rate_up_to_max():
+    bucket = TokenBucket(rate=1.0, capacity=1)
+
+    for _ in range(1000):
+        bucket.on_success()
+
+    assert bucket.rate == bucket.max_rate
+
+
+class FakeClient:
+    """Pyrogram client whose invoke, like the real one, sleeps on FloodWait up to sleep_threshold"""
+
+    def __init__(self, message_ids, flood_on_offsets=(), sleep_threshold=60):
+        self.message_ids = message_ids
+        self.flood_on_offsets = set(flood_on_offsets)
+        self.sleep_threshold = sleep_threshold
+        self.requests = []
+        self.swallowed = 0
+
+    async def resolve_peer(self, chat_id):
+        return chat_id
+
+    async def invoke(self, query, sleep_threshold=None):
+        threshold = self.sleep_threshold if sleep_threshold is None else sleep_threshold
+        self.requests.append(query.offset_id)
+        if query.offset_id in self.flood_on_offsets:
+            self.flood_on_offsets.remove(query.offset_id)
+            if 1 > threshold:
+                raise FloodWait(value=1)
+            self.swallowed += 1
+        older = [i for i in self.message_ids if not query.offset_id or i < query.offset_id]
+        return older[:query.limit]
+
+
+async def fake_parse_messages(client, messages, replies=None):
+    return [SimpleNamespace(id=message_id) for message_id in messages]
+
+
+def record_flood_wait(self, seconds):
+    # Как TokenBucket.on_flood_wait, но без блокировки, чтобы тест не ждал
+    self.rate = max(self.min_rate, self.rate / 2)
+
+
+@pytest.mark.asyncio
+async def test_history_is_paged_and_resumed_after_flood_wait(monkeypatch):
+    monkeypatch.setattr("core.rate_limiter.HISTORY_PAGE_SIZE", 2)
+    monkeypatch.setattr("core.rate_limiter.utils.parse_messages", fake_parse_messages)
+    monkeypatch.setattr("core.rate_limiter.TokenBucket.on_flood_wait", record_flood_wait)
+    fake = FakeClient([6, 5, 4, 3, 2, 1], flood_on_offsets=[3])
+    limiter = RateLimiter({"default": (1000.0, 100)})
+    client = RateLimitedClient(fake, limiter)
+
+    ids = [message.id async for message in client.get_chat_history(1, limit=5)]
+
+    assert ids == [6, 5, 4, 3, 2]
+    # FloodWait не проглочен внутри Pyrogram, а дошёл до лимитера
+    assert fake.swallowed == 0
+    # the page after FloodWait is requested again from the same offset
+    assert fake.requests == [0, 5, 3, 3]
+    assert limiter.bucket("history").rate < 1000.0
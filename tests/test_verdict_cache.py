@@ -0,0 +1,58 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.verdict_cache import VerdictCache, normalize_text, verdict_key
+
+
+def test_normalization_ignores_links_case_and_whitespace():
+    assert normalize_text("Заработок  БЕЗ вложений\nhttps://t.me/scam?x=1") == "заработок без вложений"
+    assert verdict_key("Пишите  в лс t.me/abc") == verdict_key("пишите в ЛС https://example.com")
+
+
+@pytest.mark.asyncio
+async def test_verdict_survives_restart_only_for_same_prompt():
+    text = f"уникальный пост {uuid.uuid4()}"
+    cache = VerdictCache(prompt_version="v1")
+    assert await cache.get(text) is None
+
+    await cache.put(text, True, "да")
+
+    # новый процесс: память пустая, вердикт берётся из таблицы
+    assert await VerdictCache(prompt_version="v1").get(text.upper()) is True
+    assert await VerdictCache(prompt_version="v2").get(text) is None
+
+
+@pytest.mark.asyncio
+async def test_expired_verdict_is_a_miss(monkeypatch):
+    text = f"старый пост {uuid.uuid4()}"
+    cache = VerdictCache(ttl_days=1, prompt_version="v1")
+    await cache.put(text, False, "нет")
+
+    later = datetime.now() + timedelta(days=2)
+
+    class FakeDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return later
+
+    monkeypatch.setattr("core.verdict_cache.datetime", FakeDatetime)
+
+    assert await cache.get(text) is None
+
+
+@pytest.mark.asyncio
+async def test_memory_is_bounded(monkeypatch):
+    async def no_db(*args):
+        return None
+
+    monkeypatch.setattr("core.verdict_cache.get_cached_verdict", no_db)
+    monkeypatch.setattr("core.verdict_cache.save_cached_verdict", no_db)
+    cache = VerdictCache(size=2, prompt_version="v1")
+
+    for text in ("a", "b", "c"):
+        await cache.put(text, True, "да")
+
+    assert await cache.get("a") is None
+    assert await cache.get("c") is True
@@ -0,0 +1,140 @@
+"""
+Local stand-in for the GigaChat OAuth and chat completions endpoints.
+
+Answers like the classifier prompt expects ("да"/"нет", or a JSON array for
+batched prompts) with configurable latency, error rate and rate limit, so
+checking can be tested and benchmarked offline:
+
+    python -m utils.fake_gigachat --port 8090 --latency 0.3 --rate-limit 20
+
+    GIGACHAT_OAUTH_URL=http://127.0.0.1:8090/api/v2/oauth
+    GIGACHAT_API_URL=http://127.0.0.1:8090/api/v1
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from collections import Counter
+
+from aiohttp import web
+
+
+# Пост считается мошенническим, если в нём есть одно из этих слов
+SCAM_MARKERS = ("заработ", "бонус", "перевод", "выигрыш", "биткоин")
+_BATCH_POST_RE = re.compile(r"### Пост (\d+)\n(.*?)(?=\n### Пост \d+\n|\Z)", re.S)
+_SINGLE_POST_RE = re.compile(r'Текст: "(.*)"\s*\Z', re.S)
+
+
+def fake_verdict(text: str) -> str:
+    return "да" if any(marker in text.lower() for marker in SCAM_MARKERS) else "нет"
+
+
+class FakeGigaChat:
+    """
+    aiohttp application with GigaChat-like endpoints.
+
+    Args:
+        latency (float): Mean answer delay of chat completions in seconds
+        jitter (float): Delay is uniform in latency +- jitter
+        error_rate (float): Share of completions answered with HTTP 500
+        rate_limit (float): Completions per second before answering 429
+            with Retry-After (0 - no limit)
+        token_ttl (float): Lifetime of issued tokens in seconds
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=0.0,
+                 token_ttl=1800.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.token_ttl = token_ttl
+        self.stats = Counter()
+        self._random = random.Random(seed)
+        self._tokens = {}
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._runner = None
+
+        self.app = web.Application()
+        self.app.router.add_post("/api/v2/oauth", self.oauth)
+        self.app.router.add_post("/api/v1/chat/completions", self.completions)
+
+    async def oauth(self, request):
+        self.stats["oauth"] += 1
+        token = uuid.uuid4().hex
+        expires_at = time.time() + self.token_ttl
+        self._tokens[token] = expires_at
+        return web.json_response({"access_token": token, "expires_at": int(expires_at * 1000)})
+
+    def _rate_limited(self) -> bool:
+        if not self.rate_limit:
+            return False
+        now = time.monotonic()
+        if now - self._window_start >= 1.0:
+            self._window_start, self._window_count = now, 0
+        self._window_count += 1
+        return self._window_count > self.rate_limit
+
+    async def completions(self, request):
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if self._tokens.get(token, 0) < time.time():
+            self.stats["401"] += 1
+            return web.Response(status=401)
+        if self._rate_limited():
+            self.stats["429"] += 1
+            return web.Response(status=429, headers={"Retry-After": "1"})
+
+        payload = await request.json()
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        await asyncio.sleep(max(0.0, delay))
+        if self._random.random() < self.error_rate:
+            self.stats["500"] += 1
+            return web.Response(status=500)
+
+        self.stats["200"] += 1
+        content = payload["messages"][-1]["content"]
+        posts = _BATCH_POST_RE.findall(content)
+        if posts:
+            answer = json.dumps(
+                [{"id": int(i), "answer": fake_verdict(text)} for i, text in posts],
+                ensure_ascii=False,
+            )
+        else:
+            single = _SINGLE_POST_RE.search(content)
+            answer = fake_verdict(single.group(1) if single else content)
+        return web.json_response({"choices": [{"message": {"role": "assistant", "content": answer}}]})
+
+    async def start(self, host="127.0.0.1", port=0) -> str:
+        """Start serving, returns the base URL (port 0 picks a free port)"""
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        host, port = self._runner.addresses[0][:2]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0)
+    args = parser.parse_args()
+
+    fake = FakeGigaChat(args.latency, args.jitter, args.error_rate, args.rate_limit)
+    web.run_app(fake.app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
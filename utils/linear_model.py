@@ -0,0 +1,103 @@
+import re
+import zlib
+
+import numpy as np
+
+# Размер пространства признаков: слова и пары слов хэшируются в 2^18 весов.
+# Признак 0 есть у каждого текста и работает как свободный член
+NUM_FEATURES = 1 << 18
+_WORD_RE = re.compile(r"[^\W\d_]+|\d+", re.UNICODE)
+_URL_RE = re.compile(r"(https?://|www\.|t\.me/)\S+", re.IGNORECASE)
+
+
+def text_features(text: str | None, num_features: int = NUM_FEATURES) -> np.ndarray:
+    """Hashed word unigrams and bigrams of the text, plus the bias feature"""
+    words = _WORD_RE.findall(_URL_RE.sub(" URL ", text or "").lower())
+    tokens = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    features = {zlib.crc32(token.encode("utf-8")) % (num_features - 1) + 1 for token in tokens}
+    features.add(0)
+    return np.fromiter(features, dtype=np.int64, count=len(features))
+
+
+def vectorize(texts, num_features: int = NUM_FEATURES):
+    """
+    Sparse binary matrix of texts as concatenated feature indices.
+
+    Returns:
+        tuple: (indices, offsets, lengths) - features of text i are
+            indices[offsets[i]:offsets[i] + lengths[i]]
+    """
+    rows = [text_features(text, num_features) for text in texts]
+    lengths = np.fromiter((len(row) for row in rows), dtype=np.int64, count=len(rows))
+    offsets = np.zeros(len(rows), dtype=np.int64)
+    if len(rows) > 1:
+        offsets[1:] = np.cumsum(lengths)[:-1]
+    indices = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+    return indices, offsets, lengths
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30, 30)))
+
+
+class HashedLogisticRegression:
+    """
+    Logistic regression over hashed n-grams, trained with mini-batch SGD.
+
+    Every text has at least the bias feature, so np.add.reduceat gives the
+    score of a whole batch at once without building a dense matrix.
+    """
+
+    def __init__(self, num_features: int = NUM_FEATURES, weights: np.ndarray = None):
+        self.num_features = num_features
+        self.weights = (
+            weights if weights is not None else np.zeros(num_features, dtype=np.float32)
+        )
+
+    def _scores(self, indices, offsets) -> np.ndarray:
+        return np.add.reduceat(self.weights[indices], offsets)
+
+    def predict_proba(self, texts) -> np.ndarray:
+        """Probability of the positive class for every text"""
+        if not len(texts):
+            return np.zeros(0)
+        indices, offsets, _ = vectorize(texts, self.num_features)
+        return _sigmoid(self._scores(indices, offsets))
+
+    def fit(self, texts, labels, epochs: int = 5, learning_rate: float = 0.05,
+            batch_size: int = 256, seed: int = 0):
+        """Train on texts with 0/1 labels, classes are weighted to equal total weight"""
+        labels = np.asarray(labels, dtype=np.float64)
+        rows = [text_features(text, self.num_features) for text in texts]
+        positives = labels.sum()
+        class_weight = {
+            1.0: len(labels) / (2 * positives) if positives else 0.0,
+            0.0: len(labels) / (2 * (len(labels) - positives)) if positives < len(labels) else 0.0,
+        }
+        sample_weight = np.where(labels == 1.0, class_weight[1.0], class_weight[0.0])
+
+        rng = np.random.default_rng(seed)
+        for _ in range(epochs):
+            order = rng.permutation(len(rows))
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                batch_rows = [rows[i] for i in batch]
+                lengths = np.fromiter((len(row) for row in batch_rows), dtype=np.int64)
+                offsets = np.zeros(len(batch), dtype=np.int64)
+                offsets[1:] = np.cumsum(lengths)[:-1]
+                indices = np.concatenate(batch_rows)
+
+                error = (_sigmoid(self._scores(indices, offsets)) - labels[batch]) * sample_weight[batch]
+                # Шаг не делится на размер пачки: у каждого признака мало примеров
+                step = np.repeat(error * learning_rate, lengths)
+                np.add.at(self.weights, indices, -step.astype(np.float32))
+        return self
+
+    def save(self, path):
+        np.savez_compressed(path, weights=self.weights)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            weights = data["weights"]
+        return cls(num_features=len(weights), weights=weights)
@@ -0,0 +1,61 @@
+import hashlib
+import random
+import re
+
+# MinHash-подпись из NUM_HASHES значений, разбитая на NUM_BANDS полос по ROWS_PER_BAND.
+# Посты с похожестью по Жаккару 0.8 совпадают хотя бы в одной полосе с вероятностью ~0.99
+NUM_BANDS = 8
+ROWS_PER_BAND = 4
+NUM_HASHES = NUM_BANDS * ROWS_PER_BAND
+# Если слов меньше, подпись не считается: короткие посты слишком похожи друг на друга
+MIN_TOKENS = 10
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20260917)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_HASHES)
+]
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def word_set(text: str | None) -> set:
+    return set(_WORD_RE.findall((text or "").lower()))
+
+
+def jaccard(first: set, second: set) -> float:
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def minhash_signature(words: set) -> list:
+    hashes = [_hash64(word) for word in words]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def lsh_bands(text: str | None) -> list | None:
+    """
+    LSH band keys of the post text, as signed 64-bit integers so they fit BIGINT.
+
+    Returns None for texts shorter than MIN_TOKENS distinct words.
+    """
+    words = word_set(text)
+    if len(words) < MIN_TOKENS:
+        return None
+    signature = minhash_signature(words)
+    bands = []
+    for band in range(NUM_BANDS):
+        rows = signature[band * ROWS_PER_BAND : (band + 1) * ROWS_PER_BAND]
+        key = _hash64(f"{band}:" + ",".join(map(str, rows)))
+        bands.append(key - (1 << 64) if key >> 63 else key)
+    return bands
+
+
+def lsh_columns(text: str | None) -> dict:
+    """Values of the lsh_band* columns of a post"""
+    bands = lsh_bands(text) or [None] * NUM_BANDS
+    return {f"lsh_band{i}": band for i, band in enumerate(bands)}